@@ -2,6 +2,8 @@ import discord
 from discord.ext import commands
 import asyncio
 import threading
+import time
+from collections import defaultdict, deque, namedtuple
 import config
 from dotenv import load_dotenv
 import os
@@ -12,10 +14,51 @@ load_dotenv()
 # Récupération du token depuis les variables d'environnement
 TOKEN = os.getenv('DISCORD_TOKEN')
 
+# Longueur maximale d'un message Discord
+MAX_MESSAGE_LENGTH = 2000
+
+# Résultat de l'envoi d'un message, transmis au callback de send_message
+DeliveryResult = namedtuple("DeliveryResult", ["contact", "message", "sent", "attempts", "latency", "error"])
+# Résultat d'une alerte d'urgence : un DeliveryResult par contact, et la durée jusqu'au dernier contact
+EmergencyReport = namedtuple("EmergencyReport", ["results", "elapsed"])
+
+class OutboundMessage:
+    """
+    Message en attente dans la file d'envoi du bot.
+
+    Attributs :
+        contact (str) : Le nom du contact destinataire.
+        message (str) : Le texte à envoyer.
+        callback (callable or None) : Appelé avec un DeliveryResult une fois l'envoi terminé ou abandonné.
+        queued_at (float) : L'instant de mise en file, selon time.monotonic.
+    """
+
+    def __init__(self, contact, message, callback=None):
+        self.contact = contact
+        self.message = message
+        self.callback = callback
+        self.queued_at = time.monotonic()
+
 class DiscordBot:
-    """Classe gérant le bot Discord dans un thread séparé pour éviter les conflits avec PyQt5."""
+    """
+    Classe gérant le bot Discord dans un thread séparé pour éviter les conflits avec PyQt5.
+
+    Les messages à envoyer passent par une file sur la boucle d'événements du bot : les
+    messages envoyés au même contact dans un court intervalle sont regroupés en un seul
+    envoi, les envois respectent une limite de débit par contact, et les échecs temporaires
+    sont réessayés avec un délai croissant.
+
+    Attributs :
+        outbox (asyncio.Queue) : Les OutboundMessage en attente d'envoi.
+        batch_delay (float) : La durée pendant laquelle une rafale de messages est regroupée, en secondes.
+        rate_limit (tuple) : Le nombre maximal d'envois par contact et la période associée, en secondes.
+        max_retries (int) : Le nombre de nouvelles tentatives après un échec temporaire.
+        retry_delay (float) : Le délai avant la première nouvelle tentative, doublé à chaque échec.
+        send_timeout (float) : La durée maximale d'une tentative d'envoi, en secondes.
+        dm_channels (dict) : Les canaux de messages privés déjà ouverts, par ID Discord du contact.
+    """
    
-    def __init__(self):
+    def __init__(self, batch_delay=0.5, rate_limit=(5, 5.0), max_retries=3, retry_delay=1.0, send_timeout=10.0):
         intents = discord.Intents.default()
         intents.messages = True
         intents.dm_messages = True
@@ -26,6 +69,16 @@ class DiscordBot:
         self.bot_thread = threading.Thread(target=self.run_bot, daemon=True)
         self.message_received_callback = None
 
+        self.outbox = asyncio.Queue()
+        self.batch_delay = batch_delay
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.send_timeout = send_timeout
+        self.send_times = defaultdict(deque)
+        self.contact_locks = defaultdict(asyncio.Lock)
+        self.dm_channels = {}
+
         self.bot.event(self.on_ready)
         self.bot.event(self.on_message)
 
@@ -33,6 +86,30 @@ class DiscordBot:
 
     async def on_ready(self):
         print(f'Bot {self.bot.user} ok')
+        # Ouvre à l'avance les canaux privés : un envoi ne coûte ensuite qu'une requête
+        results = await asyncio.gather(*(self.get_dm_channel(contact_id) for contact_id in config.contacts.values()),
+                                       return_exceptions=True)
+        for contact_name, result in zip(config.contacts, results):
+            if isinstance(result, Exception):
+                print(f" Canal privé de {contact_name} indisponible : {result}")
+
+    async def get_dm_channel(self, contact_id):
+        """
+        Retourne le canal de messages privés d'un contact, ouvert une seule fois puis mis en cache.
+
+        Args:
+            contact_id (int): L'ID Discord du contact.
+
+        Returns:
+            discord.DMChannel: Le canal privé du contact.
+        """
+        channel = self.dm_channels.get(contact_id)
+        if channel is not None:
+            return channel
+        user = self.bot.get_user(contact_id) or await self.bot.fetch_user(contact_id)
+        channel = user.dm_channel or await user.create_dm()
+        self.dm_channels[contact_id] = channel
+        return channel
 
     async def on_message(self, message):
         if message.author == self.bot.user:
@@ -41,42 +118,183 @@ class DiscordBot:
             contact_name = next((name for name, id in config.contacts.items() if id == message.author.id), "Inconnu")
             print(f" Message reçu de {contact_name}: {message.content}")
             if self.message_received_callback:
-                self.message_received_callback(message.content)
+                self.message_received_callback(contact_name, message.content)
 
     def run_bot(self):
         asyncio.set_event_loop(self.loop)
+        self.loop.create_task(self._process_outbox())
         self.loop.run_until_complete(self.bot.start(TOKEN))
 
-    async def send_message_discord(self, contact_name, message):
-        try:
+    async def _process_outbox(self):
+        # Regroupe les messages arrivés pendant batch_delay, puis les envoie par contact
+        while True:
+            batch = [await self.outbox.get()]
+            await asyncio.sleep(self.batch_delay)
+            while not self.outbox.empty():
+                batch.append(self.outbox.get_nowait())
+
+            by_contact = defaultdict(list)
+            for item in batch:
+                by_contact[item.contact].append(item)
+            for contact, items in by_contact.items():
+                self.loop.create_task(self._deliver(contact, items))
+
+    async def _deliver(self, contact_name, items):
+        """
+        Envoie les messages regroupés d'un contact et informe chaque callback du résultat.
+
+        Args:
+            contact_name (str): Le nom du contact destinataire.
+            items (list): Les OutboundMessage à envoyer, dans l'ordre.
+        """
+        # Le verrou garde l'ordre des envois d'un même contact entre deux rafales
+        async with self.contact_locks[contact_name]:
+            attempts, error = 0, None
             contact_id = config.contacts.get(contact_name)
-            if contact_id:
-                user = await self.bot.fetch_user(contact_id)
-                await user.send(message)
-                print(f" Message envoyé à {contact_name} ({contact_id}) !")
+            if contact_id is None:
+                error = "Utilisateur non trouvé."
             else:
-                print("Utilisateur non trouvé.")
-        except Exception as e:
-            print(f" Erreur d'envoi du message : {e}")
-    
-    async def send_emergency_message_discord(self):
-        try:
-            for contact_name, contact_id in config.contacts.items():
-                user = await self.bot.fetch_user(contact_id)
-                await user.send("Urgence ⚠️")
+                for chunk in self._chunks([item.message for item in items]):
+                    attempts, error = await self._send_with_retry(contact_id, chunk)
+                    if error is not None:
+                        break
+
+        now = time.monotonic()
+        if error is None:
+            print(f" {len(items)} message(s) envoyé(s) à {contact_name} ({contact_id}) !")
+        else:
+            print(f" Erreur d'envoi du message à {contact_name} : {error}")
+        for item in items:
+            if item.callback is not None:
+                item.callback(DeliveryResult(contact_name, item.message, error is None, attempts, now - item.queued_at, error))
+
+    def _chunks(self, messages):
+        # Assemble les messages en textes de moins de MAX_MESSAGE_LENGTH caractères
+        chunk = ""
+        for message in messages:
+            if chunk and len(chunk) + 1 + len(message) > MAX_MESSAGE_LENGTH:
+                yield chunk
+                chunk = ""
+            chunk = f"{chunk}\n{message}" if chunk else message[:MAX_MESSAGE_LENGTH]
+        if chunk:
+            yield chunk
+
+    async def _wait_rate_limit(self, contact_id):
+        # Attend qu'un envoi soit permis par la limite de débit du contact
+        count, period = self.rate_limit
+        times = self.send_times[contact_id]
+        while times and time.monotonic() - times[0] > period:
+            times.popleft()
+        if len(times) >= count:
+            await asyncio.sleep(period - (time.monotonic() - times[0]))
+            times.popleft()
+        times.append(time.monotonic())
+
+    async def _send_with_retry(self, contact_id, text, retries=None, timeout=None, rate_limited=True):
+        """
+        Envoie un texte en message privé, en réessayant les échecs temporaires.
+
+        Args:
+            contact_id (int): L'ID Discord du destinataire.
+            text (str): Le texte à envoyer.
+            retries (int, optional): Le nombre de nouvelles tentatives. Par défaut max_retries.
+            timeout (float, optional): La durée maximale d'une tentative. Par défaut send_timeout.
+            rate_limited (bool, optional): Respecter la limite de débit locale. Par défaut True.
+
+        Returns:
+            tuple: (nombre de tentatives, None ou la dernière erreur).
+        """
+        retries = self.max_retries if retries is None else retries
+        timeout = self.send_timeout if timeout is None else timeout
+        error = None
+        for attempt in range(retries + 1):
+            if rate_limited:
+                await self._wait_rate_limit(contact_id)
+            try:
+                await asyncio.wait_for(self._send_dm(contact_id, text), timeout)
+                return attempt + 1, None
+            except discord.Forbidden as e:
+                # Messages privés fermés : inutile de réessayer
+                return attempt + 1, e
+            except (discord.HTTPException, OSError, asyncio.TimeoutError) as e:
+                error = e
+                if attempt < retries:
+                    # Une réponse 429 indique elle-même le délai à respecter
+                    retry_after = getattr(e, "retry_after", None)
+                    await asyncio.sleep(retry_after or self.retry_delay * 2 ** attempt)
+        return retries + 1, error
+
+    async def _send_dm(self, contact_id, text):
+        # L'ID d'un canal privé ne change pas : une nouvelle tentative réutilise le canal en cache
+        channel = await self.get_dm_channel(contact_id)
+        await channel.send(text)
+
+    async def send_emergency_message_discord(self, message="Urgence ⚠️", timeout=5.0, retries=2):
+        """
+        Envoie l'alerte d'urgence à tous les contacts en parallèle.
+
+        Chaque contact a ses propres délais et tentatives : l'échec ou la lenteur de l'un
+        ne retarde pas les autres. L'alerte contourne la file d'envoi des messages ordinaires
+        et la limite de débit locale, qu'une rafale de messages ordinaires a pu épuiser ;
+        seules les réponses 429 de Discord la ralentissent.
+
+        Args:
+            message (str, optional): Le texte de l'alerte. Par défaut "Urgence ⚠️".
+            timeout (float, optional): La durée maximale d'une tentative, en secondes. Par défaut 5.
+            retries (int, optional): Le nombre de nouvelles tentatives par contact. Par défaut 2.
+
+        Returns:
+            EmergencyReport: Le résultat de chaque contact et la durée jusqu'au dernier contact.
+        """
+        start = time.monotonic()
+
+        async def alert(contact_name, contact_id):
+            attempts, error = await self._send_with_retry(contact_id, message, retries, timeout, rate_limited=False)
+            if error is None:
                 print(f" Message d'urgence envoyé à {contact_name} ({contact_id}) !")
-        except Exception as e:
-            print(f" Erreur lors de l'envoi du message d'urgence : {e}")
+            else:
+                print(f" Erreur lors de l'envoi du message d'urgence à {contact_name} : {error}")
+            return DeliveryResult(contact_name, message, error is None, attempts, time.monotonic() - start, error)
 
+        contacts = list(config.contacts.items())
+        outcomes = await asyncio.gather(*(alert(name, contact_id) for name, contact_id in contacts), return_exceptions=True)
+        results = [outcome if not isinstance(outcome, Exception)
+                   else DeliveryResult(name, message, False, 1, time.monotonic() - start, outcome)
+                   for (name, _), outcome in zip(contacts, outcomes)]
+        return EmergencyReport(results, time.monotonic() - start)
 
-    def send_message(self, contact_name, message):
-        asyncio.run_coroutine_threadsafe(self.send_message_discord(contact_name, message), self.loop)
+    def send_message(self, contact_name, message, callback=None):
+        """
+        Met un message en file d'envoi, depuis n'importe quel thread.
+
+        Args:
+            contact_name (str): Le nom du contact destinataire.
+            message (str): Le texte à envoyer.
+            callback (callable, optional): Appelé depuis le thread du bot avec un DeliveryResult.
+        """
+        item = OutboundMessage(contact_name, message, callback)
+        self.loop.call_soon_threadsafe(self.outbox.put_nowait, item)
    
 
-    def send_emergency_message(self):
-        asyncio.run_coroutine_threadsafe(self.send_emergency_message_discord(), self.loop)
+    def send_emergency_message(self, callback=None):
+        """
+        Lance l'alerte d'urgence depuis n'importe quel thread.
+
+        Args:
+            callback (callable, optional): Appelé depuis le thread du bot avec l'EmergencyReport.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.send_emergency_message_discord(), self.loop)
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(f.result()) if f.exception() is None else
+                                     print(f" Erreur lors de l'envoi du message d'urgence : {f.exception()}"))
 
     def set_message_received_callback(self, callback):
+        """
+        Définit la fonction appelée pour chaque message privé reçu d'un contact.
+
+        Args:
+            callback (callable): Appelée depuis le thread du bot avec (nom du contact, texte).
+        """
         self.message_received_callback = callback
 
 if __name__ == "__main__":
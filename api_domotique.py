@@ -1,47 +1,422 @@
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import threading
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict, namedtuple
+from concurrent.futures import wait
+import config
 
-# Configuration
+# Valeurs par défaut des arguments de ConnectedSocket ; les contrôleurs utilisés sont
+# définis dans config.controllers
 BASE_URL = "http://10.10.195.32"
 USERNAME = "ubnt"
 PASSWORD = "ubnt"
+TIMEOUT = 3
+
+# Durée de vie supposée d'une session AIROS_SESSIONID quand le cookie ne l'indique pas, en secondes
+SESSION_LIFETIME = 600
+
+# Délai minimal entre deux renouvellements de session, et délai après un échec, en secondes
+MIN_RENEW_DELAY = 5.0
+RENEW_RETRY_DELAY = 10.0
+
+# Motif de clignotement par défaut : (état, durée en secondes)
+BLINK_PATTERN = ((1, 1.0), (0, 1.0))
+
+class SocketStateCache:
+    """
+    Cache de l'état de sortie des prises, avec une durée de validité.
+
+    Attributs :
+        ttl (float) : La durée de validité d'une entrée, en secondes.
+        entries (dict) : Les couples (état, instant de mise à jour) par ID de prise.
+    """
+
+    def __init__(self, ttl=10.0):
+        """
+        Initialise la classe SocketStateCache.
+
+        Args:
+            ttl (float, optional): Durée de validité d'une entrée, en secondes. Par défaut 10.
+        """
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, socket_id):
+        """
+        Retourne l'état en cache d'une prise s'il est encore valide.
+
+        Args:
+            socket_id (str): L'ID de la prise connectée.
+
+        Returns:
+            int or None: L'état de la prise, ou None si absent ou périmé.
+        """
+        with self.lock:
+            entry = self.entries.get(socket_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def set(self, socket_id, state):
+        """
+        Enregistre l'état d'une prise.
+
+        Args:
+            socket_id (str): L'ID de la prise connectée.
+            state (int): L'état de la prise (0 ou 1).
+        """
+        with self.lock:
+            self.entries[socket_id] = (state, time.monotonic())
+
+    def invalidate(self, socket_id=None):
+        """
+        Oublie l'état d'une prise, ou de toutes les prises si socket_id est None.
+
+        Args:
+            socket_id (str, optional): L'ID de la prise connectée.
+        """
+        with self.lock:
+            if socket_id is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(socket_id, None)
+
+class SensorSnapshot:
+    """
+    Table compacte de l'état de toutes les prises d'un contrôleur, obtenue en une requête.
+
+    Les valeurs de chaque prise sont stockées dans un tuple, dans l'ordre de columns.
+
+    Attributs :
+        columns (dict) : L'index de chaque clé (output, power, ...) dans les lignes.
+        rows (dict) : Le tuple des valeurs de chaque prise, par ID de prise.
+        timestamp (float) : L'instant de la lecture, selon time.monotonic.
+    """
+
+    def __init__(self, sensors):
+        """
+        Initialise la classe SensorSnapshot.
+
+        Args:
+            sensors (list): La liste "sensors" renvoyée par /sensors, un dictionnaire par prise.
+        """
+        keys = sorted({key for sensor in sensors for key in sensor})
+        self.columns = {key: index for index, key in enumerate(keys)}
+        self.rows = {}
+        for index, sensor in enumerate(sensors):
+            socket_id = int(sensor.get('port', index + 1))
+            self.rows[socket_id] = tuple(sensor.get(key) for key in keys)
+        self.timestamp = time.monotonic()
+
+    def age(self):
+        """
+        Retourne l'âge de la table, en secondes.
+        """
+        return time.monotonic() - self.timestamp
+
+    def socket_ids(self):
+        """
+        Retourne les ID des prises présentes dans la table.
+        """
+        return list(self.rows)
+
+    def get(self, socket_id, key):
+        """
+        Retourne une information d'une prise.
+
+        Args:
+            socket_id (int): L'ID de la prise connectée.
+            key (str): La clé de l'information.
+
+        Returns:
+            La valeur demandée, ou None si la prise ou la clé est inconnue.
+        """
+        row = self.rows.get(int(socket_id))
+        column = self.columns.get(key)
+        if row is None or column is None:
+            return None
+        return row[column]
+
+class SessionManager:
+    """
+    Gère la durée de vie de la session AIROS_SESSIONID d'un ConnectedSocket.
+
+    Une seule authentification est en cours à la fois : les requêtes qui trouvent la session
+    expirée pendant ce temps attendent son résultat. Un thread renouvelle la session avant
+    son expiration pour que les commandes ne paient jamais le coût d'une authentification.
+
+    Attributs :
+        socket (ConnectedSocket) : Le client dont la session est gérée.
+        lifetime (float) : La durée de vie supposée d'une session, en secondes.
+        renew_margin (float) : L'avance avec laquelle la session est renouvelée, en secondes.
+        expires_at (float) : L'instant d'expiration de la session courante, selon time.monotonic.
+        renew_at (float) : L'instant du prochain renouvellement, selon time.monotonic.
+        logging_in (bool) : Indique si une authentification est en cours.
+    """
+
+    def __init__(self, socket, lifetime=SESSION_LIFETIME, renew_margin=60.0):
+        """
+        Initialise la classe SessionManager.
+
+        Args:
+            socket (ConnectedSocket): Le client dont la session est gérée.
+            lifetime (float, optional): Durée de vie d'une session, en secondes. Par défaut SESSION_LIFETIME.
+            renew_margin (float, optional): Avance du renouvellement, en secondes. Par défaut 60.
+        """
+        self.socket = socket
+        self.lifetime = lifetime
+        self.renew_margin = renew_margin
+        self.expires_at = 0.0
+        self.renew_at = 0.0
+        self.logging_in = False
+        self.condition = threading.Condition()
+        self.renewal_thread = None
+        self.renewal_stop = threading.Event()
+
+    def valid(self):
+        """
+        Indique si la session courante est encore valide.
+        """
+        return bool(self.socket.session_id) and time.monotonic() < self.expires_at
+
+    def ensure(self):
+        """
+        Retourne l'ID de la session courante, en s'authentifiant si elle a expiré.
+
+        Returns:
+            str or None: L'ID de session, ou None si l'authentification a échoué.
+        """
+        if self.valid():
+            return self.socket.session_id
+        try:
+            return self.login()
+        except requests.exceptions.RequestException as e:
+            print(f"Erreur lors de l'authentification : {e}")
+            return None
+
+    def login(self):
+        """
+        S'authentifie, ou attend l'authentification déjà en cours dans un autre thread.
+
+        La session courante reste utilisable pendant l'authentification : un renouvellement
+        en arrière-plan ne bloque pas les requêtes. En cas d'échec, elle reste en place
+        jusqu'à son expiration.
+
+        Returns:
+            str or None: L'ID de session obtenu, ou None si aucune session n'est valide.
+        """
+        with self.condition:
+            if self.logging_in:
+                while self.logging_in:
+                    self.condition.wait()
+                return self.socket.session_id if self.valid() else None
+            self.logging_in = True
+
+        session_id = None
+        try:
+            session_id, expires = self.socket._login()
+        finally:
+            with self.condition:
+                now = time.monotonic()
+                if session_id:
+                    lifetime = self.lifetime
+                    if expires:
+                        lifetime = min(lifetime, expires - time.time())
+                    self.expires_at = now + lifetime
+                    # Une session courte ou une horloge décalée ne doit pas renouveler en boucle
+                    self.renew_at = now + max(lifetime - self.renew_margin, lifetime / 2, MIN_RENEW_DELAY)
+                else:
+                    self.renew_at = now + RENEW_RETRY_DELAY
+                self.logging_in = False
+                self.condition.notify_all()
+
+        if session_id:
+            self.start_renewal()
+        return session_id
+
+    def invalidate(self, session_id):
+        """
+        Marque une session comme expirée, si elle est toujours la session courante.
+
+        Args:
+            session_id (str): L'ID de la session trouvée expirée.
+        """
+        with self.condition:
+            if self.socket.session_id == session_id:
+                self.expires_at = 0.0
+
+    def is_expired(self, response):
+        """
+        Indique si une réponse signale une session expirée.
+
+        Args:
+            response (requests.Response): La réponse du contrôleur.
+
+        Returns:
+            bool: True si la réponse est un refus, une redirection vers la page de connexion,
+                ou une page HTML renvoyée à la place du JSON.
+        """
+        if response.status_code in (401, 403):
+            return True
+        if response.is_redirect and "login.cgi" in response.headers.get("Location", ""):
+            return True
+        return "text/html" in response.headers.get("Content-Type", "")
+
+    def start_renewal(self):
+        """
+        Démarre le thread de renouvellement de la session, s'il ne tourne pas déjà.
+        """
+        if self.renewal_thread is not None:
+            return
+        self.renewal_thread = threading.Thread(target=self._renew, daemon=True)
+        self.renewal_thread.start()
+
+    def stop_renewal(self):
+        """
+        Arrête le renouvellement de la session.
+        """
+        self.renewal_stop.set()
+
+    def _renew(self):
+        delay = 0.0
+        while not self.renewal_stop.wait(delay):
+            remaining = self.renew_at - time.monotonic()
+            if remaining > 0:
+                delay = remaining
+                continue
+            try:
+                # login() reporte renew_at, y compris quand il échoue sans exception
+                self.login()
+                delay = 0.0
+            except requests.exceptions.RequestException as e:
+                print(f"Erreur lors du renouvellement de la session : {e}")
+                with self.condition:
+                    self.renew_at = time.monotonic() + RENEW_RETRY_DELAY
+                delay = RENEW_RETRY_DELAY
 
 class ConnectedSocket:
     """
     Classe pour gérer les interactions avec une prise connectée via une API HTTP.
 
     Attributs :
-        session (requests.Session) : La session HTTP utilisée pour les requêtes.
+        base_url (str) : L'adresse du contrôleur de prises.
+        username (str) : Le nom d'utilisateur du contrôleur.
+        password (str) : Le mot de passe du contrôleur.
+        timeout (float) : Le délai maximal d'une requête, en secondes.
+        session (requests.Session) : La session HTTP utilisée pour les requêtes, dont les connexions
+            sont conservées (keep-alive) dans un pool.
         session_id (str) : L'ID de session obtenu après authentification.
+        socket_locks (defaultdict) : Un verrou par prise, pour que les bascules d'une même prise
+            s'exécutent dans l'ordre même depuis plusieurs threads.
+        state_cache (SocketStateCache) : L'état de sortie connu de chaque prise.
+        snapshot (SensorSnapshot) : La dernière table de l'état de toutes les prises.
+        session_manager (SessionManager) : Le gestionnaire de la durée de vie de la session.
     """
 
-    def __init__(self):
+    def __init__(self, base_url=BASE_URL, username=USERNAME, password=PASSWORD, timeout=TIMEOUT, pool_size=4, cache_ttl=10.0):
+        """
+        Initialise la classe ConnectedSocket.
+
+        Args:
+            base_url (str, optional): L'adresse du contrôleur. Par défaut BASE_URL.
+            username (str, optional): Le nom d'utilisateur. Par défaut USERNAME.
+            password (str, optional): Le mot de passe. Par défaut PASSWORD.
+            timeout (float, optional): Délai maximal d'une requête, en secondes. Par défaut TIMEOUT.
+            pool_size (int, optional): Nombre de connexions conservées ouvertes. Par défaut 4.
+            cache_ttl (float, optional): Durée de validité de l'état en cache d'une prise. Par défaut 10 s.
+        """
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.timeout = timeout
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.session_id = None
+        self.session_manager = SessionManager(self)
+        self.socket_locks = defaultdict(threading.Lock)
+        self.state_cache = SocketStateCache(cache_ttl)
+        self.snapshot = None
+        self.polling_thread = None
+        self.blink_scheduler = None
 
     def authenticate(self):
         """
         Authentifie l'utilisateur et établit une session en utilisant les informations de connexion.
-        Enregistre l'ID de session pour les requêtes ultérieures.
+
+        Si une authentification est déjà en cours dans un autre thread, attend son résultat
+        au lieu d'en lancer une seconde.
+
+        Returns:
+            str or None: L'ID de session obtenu.
+        """
+        return self.session_manager.login()
+
+    def _login(self):
+        """
+        Envoie les informations de connexion et enregistre l'ID de session.
+
+        L'ID de session courant n'est remplacé qu'une fois le nouveau obtenu.
+
+        Returns:
+            tuple: (ID de session ou None, date d'expiration du cookie en secondes epoch ou None).
         """
-        login_url = f"{BASE_URL}/login.cgi"
+        login_url = f"{self.base_url}/login.cgi"
         data = {
-            "username": USERNAME,
-            "password": PASSWORD
+            "username": self.username,
+            "password": self.password
         }
-        response = self.session.post(login_url, data=data)
+        response = self.session.post(login_url, data=data, timeout=self.timeout)
         response.raise_for_status()
 
         # Affiche les cookies pour débogage
         print(f"Cookies reçus : {self.session.cookies}")
-        for cookie in self.session.cookies:
+        # Seuls les cookies posés par cette connexion comptent : le cookie de l'ancienne session
+        # reste dans la session HTTP pour les requêtes en cours
+        session_id, expires = None, None
+        for cookie in [cookie for r in response.history + [response] for cookie in r.cookies]:
             if cookie.name == 'AIROS_SESSIONID':
-                self.session_id = cookie.value
-        if self.session_id:
+                session_id = cookie.value
+                expires = cookie.expires
+        if session_id:
+            self.session_id = session_id
             print("Authentification réussie")
         else:
             print("Échec de l'obtention de l'ID de session")
+        return session_id, expires
+
+    def _request(self, method, url, **kwargs):
+        """
+        Effectue une requête authentifiée, en renouvelant la session si elle a expiré.
+
+        L'expiration est détectée par le code de statut, une redirection vers login.cgi ou
+        une page HTML à la place du JSON attendu, sans lire le corps de la réponse.
+
+        Args:
+            method (str): La méthode HTTP.
+            url (str): L'adresse à interroger.
+            **kwargs: Les arguments transmis à requests.Session.request.
+
+        Returns:
+            requests.Response: La réponse du contrôleur.
+        """
+        for attempt in range(2):
+            session_id = self.session_manager.ensure()
+            if not session_id:
+                raise requests.exceptions.ConnectionError("Authentification impossible")
+            response = self.session.request(method, url, timeout=self.timeout, allow_redirects=False, **kwargs)
+            if not self.session_manager.is_expired(response) or attempt == 1:
+                break
+            print("Session expirée, réauthentification requise")
+            self.session_manager.invalidate(session_id)
+        response.raise_for_status()
+        return response
 
     def get_socket_info_key(self, socket_id, key):
         """
@@ -54,19 +429,19 @@ class ConnectedSocket:
         Returns:
             dict or None: La valeur de l'information demandée ou None si une erreur survient.
         """
-        if not self.session_id:
-            print("Vous devez vous authentifier d'abord")
-            return None
-        url = f"{BASE_URL}/sensors/{socket_id}/{key}"
-        response = self.session.get(url)
-        response.raise_for_status()
+        return self._get_json(f"{self.base_url}/sensors/{socket_id}/{key}")
+
+    def _get_json(self, url):
+        """
+        Effectue une requête GET authentifiée et décode la réponse JSON.
 
-        # Vérification de si la réponse est une page de connexion
-        if "Login" in response.text:
-            print("Page de connexion reçue, réauthentification requise")
-            self.authenticate()
-            response = self.session.get(url)
-            response.raise_for_status()
+        Args:
+            url (str): L'adresse à interroger.
+
+        Returns:
+            dict or None: La réponse décodée, ou None si elle est vide ou invalide.
+        """
+        response = self._request("GET", url)
 
         # Vérification de si la réponse est vide ou non JSON
         if response.text.strip() == "":
@@ -80,6 +455,53 @@ class ConnectedSocket:
             print("Texte de la réponse :", response.text)
             return None
 
+    def get_sensors_snapshot(self):
+        """
+        Récupère en une seule requête l'état de toutes les prises du contrôleur.
+
+        La table obtenue est conservée dans snapshot et alimente le cache d'état des prises.
+
+        Returns:
+            SensorSnapshot or None: L'état de toutes les prises, ou None si une erreur survient.
+        """
+        try:
+            data = self._get_json(f"{self.base_url}/sensors")
+        except requests.exceptions.RequestException as e:
+            print(f"Erreur lors de la lecture des prises : {e}")
+            return None
+        if not isinstance(data, dict) or 'sensors' not in data:
+            print("Liste des prises non trouvée dans la réponse")
+            return None
+
+        snapshot = SensorSnapshot(data['sensors'])
+        self.snapshot = snapshot
+        for socket_id in snapshot.socket_ids():
+            output = snapshot.get(socket_id, "output")
+            if output is not None:
+                self.state_cache.set(socket_id, output)
+        return snapshot
+
+    def get_socket_info(self, socket_id, key, max_age=None):
+        """
+        Obtient une information d'une prise depuis la dernière table de toutes les prises,
+        rafraîchie si elle est plus ancienne que max_age.
+
+        Args:
+            socket_id (int): L'ID de la prise connectée.
+            key (str): La clé de l'information à récupérer.
+            max_age (float, optional): Âge maximal de la table, en secondes. Par défaut la durée du cache d'état.
+
+        Returns:
+            La valeur demandée, ou None si elle est inconnue.
+        """
+        max_age = self.state_cache.ttl if max_age is None else max_age
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.age() > max_age:
+            snapshot = self.get_sensors_snapshot()
+        if snapshot is None:
+            return None
+        return snapshot.get(socket_id, key)
+
     def toggle_socket_state(self, socket_id, state=None):
         """
         Bascule l'état d'une prise connectée.
@@ -87,68 +509,460 @@ class ConnectedSocket:
         Args:
             socket_id (str): L'ID de la prise connectée.
             state (int, optional): L'état à définir (0 ou 1). Si None, bascule l'état actuel.
+
+        Returns:
+            int or None: Le nouvel état de la prise, ou None si la bascule a échoué.
         """
-        if not self.session_id:
-            print("Vous devez vous authentifier d'abord")
-            return
-        current_state = self.get_socket_info_key(socket_id, "output")
+        with self.socket_locks[socket_id]:
+            return self._toggle_socket_state(socket_id, state)
+
+    def _toggle_socket_state(self, socket_id, state):
+        # Un état explicite ne nécessite aucune lecture préalable
+        if state is not None:
+            return self._put_socket_output(socket_id, state)
+
+        cached_state = self.state_cache.get(socket_id)
+        current_state = cached_state if cached_state is not None else self.read_socket_output(socket_id)
         if current_state is None:
             print("Échec de la récupération de l'état actuel")
-            return
+            return None
 
         print(f"État actuel de la prise {socket_id} : {current_state}")
+        new_state = self._put_socket_output(socket_id, 1 if current_state == 0 else 0)
+
+        # L'état en cache était peut-être faux : relecture puis nouvel essai
+        if new_state is None and cached_state is not None:
+            current_state = self.read_socket_output(socket_id)
+            if current_state is None:
+                return None
+            new_state = self._put_socket_output(socket_id, 1 if current_state == 0 else 0)
+        return new_state
+
+    def read_socket_output(self, socket_id):
+        """
+        Lit l'état de sortie d'une prise sur le contrôleur et met à jour le cache.
+
+        Args:
+            socket_id (str): L'ID de la prise connectée.
+
+        Returns:
+            int or None: L'état de la prise (0 ou 1), ou None si la lecture a échoué.
+        """
+        try:
+            current_state = self.get_socket_info_key(socket_id, "output")
+        except requests.exceptions.RequestException as e:
+            print(f"Erreur lors de la lecture de la prise {socket_id} : {e}")
+            return None
 
         # Extraction de l'état actuel de la réponse JSON
         if isinstance(current_state, dict) and 'sensors' in current_state:
             sensors = current_state.get('sensors', [])
             if len(sensors) > 0 and 'output' in sensors[0]:
-                current_state = sensors[0]['output']
-            else:
-                print("État actuel non trouvé dans la réponse")
-                return
-        else:
-            print("État actuel non trouvé dans la réponse")
-            return
+                output = sensors[0]['output']
+                self.state_cache.set(socket_id, output)
+                return output
+        print("État actuel non trouvé dans la réponse")
+        return None
 
-        # Nouvel état
-        if state is None:
-            new_state = 1 if current_state == 0 else 0
-        else:
-            new_state = state
-            
+    def _put_socket_output(self, socket_id, new_state):
+        """
+        Envoie l'état de sortie d'une prise au contrôleur.
+
+        Args:
+            socket_id (str): L'ID de la prise connectée.
+            new_state (int): L'état à définir (0 ou 1).
+
+        Returns:
+            int or None: L'état défini, ou None si la requête a échoué.
+        """
         data = {"output": new_state}
-        url = f"{BASE_URL}/sensors/{socket_id}"
-        response = self.session.put(url, data=data)
-        response.raise_for_status()
+        url = f"{self.base_url}/sensors/{socket_id}"
+        try:
+            self._request("PUT", url, data=data)
+        except requests.exceptions.RequestException as e:
+            print(f"Erreur lors du changement d'état de la prise {socket_id} : {e}")
+            self.state_cache.invalidate(socket_id)
+            return None
+        self.state_cache.set(socket_id, new_state)
         print(f"État de la prise {socket_id} défini à {new_state}")
+        return new_state
 
-    def blink_socket(self, socket_id):
+    def start_polling(self, interval=5.0):
+        """
+        Démarre un thread qui rafraîchit régulièrement l'état de toutes les prises,
+        en une requête par cycle.
+
+        Args:
+            interval (float, optional): Délai entre deux rafraîchissements, en secondes. Par défaut 5.
+        """
+        self.stop_polling()
+        self.polling_stop = threading.Event()
+        self.polling_thread = threading.Thread(target=self._poll_states, args=(interval, self.polling_stop), daemon=True)
+        self.polling_thread.start()
+
+    def _poll_states(self, interval, stop):
+        while not stop.wait(interval):
+            self.get_sensors_snapshot()
+
+    def stop_polling(self):
+        """
+        Arrête le rafraîchissement du cache, sans attendre la fin de la requête en cours.
+        """
+        if self.polling_thread:
+            self.polling_stop.set()
+            self.polling_thread = None
+
+    def blink_socket(self, socket_id, pattern=BLINK_PATTERN):
         """
         Fait clignoter une prise connectée.
 
         Args:
             socket_id (str): L'ID de la prise connectée.
+            pattern (tuple, optional): Suite de couples (état, durée en secondes). Par défaut BLINK_PATTERN.
+        """
+        if self.blink_scheduler is None:
+            self.blink_scheduler = BlinkScheduler(self)
+        self.blink_scheduler.start(socket_id, pattern)
+
+    def stop_blinking(self, socket_id=None, final_state=None):
+        """
+        Arrête le clignotement d'une prise, ou de toutes les prises, sans attendre.
+
+        Args:
+            socket_id (str, optional): L'ID de la prise connectée. Par défaut toutes les prises.
+            final_state (int, optional): L'état à donner à la prise une fois le clignotement arrêté.
+
+        Returns:
+            Future or None: L'envoi de l'état final, s'il a été demandé.
+        """
+        if self.blink_scheduler is None:
+            return None
+        return self.blink_scheduler.cancel(socket_id, final_state)
+
+class BlinkScheduler:
+    """
+    Planificateur unique de tous les clignotements : un seul thread parcourt une file de
+    priorité d'échéances et envoie à chaque prise l'état explicite prévu par son motif.
+
+    Les états sont envoyés sans lecture préalable, par un petit pool de threads pour qu'une
+    prise lente ne retarde pas les autres. Les échéances sont calculées à partir de
+    l'échéance précédente et non de l'heure de fin des requêtes, il n'y a donc pas de dérive.
+
+    Attributs :
+        socket (ConnectedSocket) : Le client utilisé pour envoyer les états.
+        executor (ThreadPoolExecutor) : Le pool de threads qui envoie les états.
+        patterns (dict) : Le motif et le numéro de génération de chaque prise qui clignote.
+        heap (list) : Les échéances (instant, génération, ID de prise, étape) à venir.
+        in_flight (dict) : La dernière requête envoyée pour chaque prise.
+    """
+
+    def __init__(self, socket, workers=2):
         """
-        self.blinking = True
-        self.blink_thread = threading.Thread(target=self._blink_socket, args=(socket_id,), daemon=True)
-        self.blink_thread.start()
+        Initialise la classe BlinkScheduler.
 
-    def _blink_socket(self, socket_id):
+        Args:
+            socket (ConnectedSocket): Le client utilisé pour envoyer les états.
+            workers (int, optional): Nombre de threads envoyant les états. Par défaut 2.
+        """
+        self.socket = socket
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clignotement")
+        self.patterns = {}
+        self.heap = []
+        self.in_flight = {}
+        self.generations = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def start(self, socket_id, pattern=BLINK_PATTERN):
         """
-        Fonction interne pour faire clignoter une prise connectée en basculant son état toutes les secondes.
+        Démarre ou remplace le motif de clignotement d'une prise.
 
         Args:
             socket_id (str): L'ID de la prise connectée.
+            pattern (tuple, optional): Suite de couples (état, durée en secondes). Par défaut BLINK_PATTERN.
+        """
+        generation = next(self.generations)
+        with self.condition:
+            self.patterns[socket_id] = (tuple(pattern), generation)
+            heapq.heappush(self.heap, (time.monotonic(), generation, socket_id, 0))
+            self.condition.notify()
+
+    def cancel(self, socket_id=None, final_state=None):
+        """
+        Arrête le clignotement d'une prise, ou de toutes, sans attendre le thread.
+
+        Args:
+            socket_id (str, optional): L'ID de la prise connectée. Par défaut toutes les prises.
+            final_state (int, optional): L'état à envoyer aux prises arrêtées.
+
+        Returns:
+            Future or None: L'envoi de l'état final (de la dernière prise si plusieurs), s'il a été demandé.
+        """
+        with self.condition:
+            socket_ids = list(self.patterns) if socket_id is None else [socket_id]
+            for stopped in socket_ids:
+                self.patterns.pop(stopped, None)
+            self.condition.notify()
+
+        future = None
+        if final_state is not None:
+            for stopped in socket_ids:
+                future = self.executor.submit(self.socket.toggle_socket_state, stopped, final_state)
+        return future
+
+    def active(self):
+        """
+        Retourne les ID des prises en train de clignoter.
+        """
+        with self.condition:
+            return list(self.patterns)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.heap or self.heap[0][0] > time.monotonic():
+                    timeout = self.heap[0][0] - time.monotonic() if self.heap else None
+                    self.condition.wait(timeout)
+                due, generation, socket_id, step = heapq.heappop(self.heap)
+                entry = self.patterns.get(socket_id)
+                # Échéance d'un motif annulé ou remplacé
+                if entry is None or entry[1] != generation:
+                    continue
+                pattern = entry[0]
+                state, duration = pattern[step % len(pattern)]
+                heapq.heappush(self.heap, (due + duration, generation, socket_id, step + 1))
+
+            # Si la requête précédente n'est pas terminée, l'état arriverait en retard : on saute l'étape
+            previous = self.in_flight.get(socket_id)
+            if previous is None or previous.done():
+                self.in_flight[socket_id] = self.executor.submit(self.socket.toggle_socket_state, socket_id, state)
+
+class AsyncSocketClient:
+    """
+    Client non bloquant pour une prise connectée : chaque appel est exécuté par un pool
+    de threads et renvoie immédiatement un Future.
+
+    Les connexions HTTP sont conservées ouvertes par la session de ConnectedSocket,
+    dont le pool est dimensionné sur le nombre de threads.
+
+    Attributs :
+        socket (ConnectedSocket) : Le client synchrone utilisé par les threads.
+        executor (ThreadPoolExecutor) : Le pool de threads exécutant les requêtes.
+    """
+
+    def __init__(self, socket=None, workers=4):
+        """
+        Initialise la classe AsyncSocketClient.
+
+        Args:
+            socket (ConnectedSocket, optional): Le client synchrone. Par défaut un nouveau ConnectedSocket.
+            workers (int, optional): Nombre de threads du pool. Par défaut 4.
+        """
+        self.socket = socket or ConnectedSocket(pool_size=workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="domotique")
+
+    def submit(self, function, *args, callback=None, **kwargs):
+        """
+        Exécute une fonction dans le pool de threads.
+
+        Args:
+            function (callable): La fonction à exécuter.
+            *args: Les arguments de la fonction.
+            callback (callable, optional): Appelée avec (résultat, exception) à la fin de l'appel,
+                depuis le thread du pool.
+            **kwargs: Les arguments nommés de la fonction.
+
+        Returns:
+            Future: Le résultat à venir de l'appel.
+        """
+        future = self.executor.submit(function, *args, **kwargs)
+        if callback is not None:
+            # Un appel annulé par shutdown n'a pas de résultat à transmettre
+            future.add_done_callback(lambda f: f.cancelled() or callback(None if f.exception() else f.result(), f.exception()))
+        return future
+
+    def authenticate(self, callback=None):
+        """
+        Version non bloquante de ConnectedSocket.authenticate.
+
+        Returns:
+            Future: La fin de l'authentification.
+        """
+        return self.submit(self.socket.authenticate, callback=callback)
+
+    def get_socket_info_key(self, socket_id, key, callback=None):
+        """
+        Version non bloquante de ConnectedSocket.get_socket_info_key.
+
+        Returns:
+            Future: L'information demandée.
+        """
+        return self.submit(self.socket.get_socket_info_key, socket_id, key, callback=callback)
+
+    def get_sensors_snapshot(self, callback=None):
+        """
+        Version non bloquante de ConnectedSocket.get_sensors_snapshot.
+
+        Returns:
+            Future: La table de l'état de toutes les prises.
+        """
+        return self.submit(self.socket.get_sensors_snapshot, callback=callback)
+
+    def toggle_socket_state(self, socket_id, state=None, callback=None):
+        """
+        Version non bloquante de ConnectedSocket.toggle_socket_state.
+
+        Returns:
+            Future: Le nouvel état de la prise, ou None si la bascule a échoué.
+        """
+        return self.submit(self.socket.toggle_socket_state, socket_id, state, callback=callback)
+
+    def shutdown(self):
+        """
+        Arrête le pool de threads sans attendre les requêtes en cours.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+CommandResult = namedtuple("CommandResult", ["controller", "socket_id", "ok", "value", "latency", "error"])
+HubReport = namedtuple("HubReport", ["results", "elapsed"])
+
+class DomotiqueHub:
+    """
+    Classe pour piloter plusieurs contrôleurs de prises en parallèle.
+
+    Chaque contrôleur a son propre ConnectedSocket, donc sa propre session et son propre
+    pool de connexions. Une commande portant sur plusieurs prises est envoyée à toutes
+    en même temps : elle dure autant que l'appareil le plus lent, et non la somme de tous.
+
+    Attributs :
+        controllers (dict) : Le ConnectedSocket de chaque contrôleur, par nom.
+        timeouts (dict) : Le délai maximal accordé à chaque contrôleur, en secondes.
+        rooms (dict) : Les prises de chaque pièce, sous forme de tuples (contrôleur, ID de prise, type).
+        executor (ThreadPoolExecutor) : Le pool de threads qui envoie les commandes.
+    """
+
+    def __init__(self, controllers=None, rooms=None, workers=8):
+        """
+        Initialise la classe DomotiqueHub.
+
+        Args:
+            controllers (dict, optional): Les paramètres de chaque contrôleur (base_url, username,
+                password, timeout). Par défaut config.controllers.
+            rooms (dict, optional): Les prises de chaque pièce. Par défaut config.rooms.
+            workers (int, optional): Nombre de commandes envoyées simultanément. Par défaut 8.
+        """
+        controllers = config.controllers if controllers is None else controllers
+        self.rooms = config.rooms if rooms is None else rooms
+        self.controllers = {}
+        self.timeouts = {}
+        for name, params in controllers.items():
+            params = dict(params)
+            self.timeouts[name] = params.get("timeout", TIMEOUT)
+            self.controllers[name] = ConnectedSocket(**params)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hub")
+
+    def _timed(self, function, *args):
+        start = time.perf_counter()
+        try:
+            value = function(*args)
+            error = None
+        except Exception as e:
+            value, error = None, e
+        return value, error, time.perf_counter() - start
+
+    def run(self, targets, command, *args):
+        """
+        Exécute une commande de ConnectedSocket sur plusieurs prises en parallèle.
+
+        Args:
+            targets (list): Les couples (contrôleur, ID de prise) visés ; l'ID peut être None
+                pour une commande qui porte sur tout le contrôleur.
+            command (str): Le nom de la méthode de ConnectedSocket à appeler.
+            *args: Les arguments ajoutés après l'ID de prise.
+
+        Returns:
+            HubReport: Le résultat et la latence de chaque prise, et la durée totale.
+        """
+        start = time.perf_counter()
+        futures = {}
+        for controller, socket_id in targets:
+            socket = self.controllers.get(controller)
+            if socket is None:
+                print(f"Contrôleur inconnu : {controller}")
+                continue
+            call_args = args if socket_id is None else (socket_id,) + args
+            futures[(controller, socket_id)] = self.executor.submit(self._timed, getattr(socket, command), *call_args)
+
+        results = []
+        for (controller, socket_id), future in futures.items():
+            # Le délai de chaque appareil court depuis le début de la commande
+            remaining = self.timeouts[controller] - (time.perf_counter() - start)
+            done, _ = wait([future], timeout=max(remaining, 0))
+            if not done:
+                results.append(CommandResult(controller, socket_id, False, None, time.perf_counter() - start, "délai dépassé"))
+                continue
+            value, error, latency = future.result()
+            if error is not None:
+                results.append(CommandResult(controller, socket_id, False, None, latency, str(error)))
+            elif value is None:
+                results.append(CommandResult(controller, socket_id, False, None, latency, "commande refusée ou injoignable"))
+            else:
+                results.append(CommandResult(controller, socket_id, True, value, latency, None))
+        return HubReport(results, time.perf_counter() - start)
+
+    def room_targets(self, room, kind=None):
+        """
+        Retourne les prises d'une pièce, éventuellement d'un seul type.
+
+        Args:
+            room (str): Le nom de la pièce.
+            kind (str, optional): Le type de prise ("lumiere", "alarme", ...). Par défaut tous.
+
+        Returns:
+            list: Les couples (contrôleur, ID de prise).
+        """
+        return [(controller, socket_id) for controller, socket_id, socket_kind in self.rooms.get(room, [])
+                if kind is None or socket_kind == kind]
+
+    def set_room_state(self, room, state, kind=None):
+        """
+        Allume ou éteint toutes les prises d'une pièce, par exemple toutes les lumières.
+
+        Args:
+            room (str): Le nom de la pièce.
+            state (int): L'état à définir (0 ou 1).
+            kind (str, optional): Le type de prise visé. Par défaut tous.
+
+        Returns:
+            HubReport: Le résultat et la latence de chaque prise.
+        """
+        report = self.run(self.room_targets(room, kind), "toggle_socket_state", state)
+        for result in report.results:
+            status = "ok" if result.ok else f"échec ({result.error})"
+            print(f"{result.controller}/{result.socket_id} : {status} en {result.latency * 1000:.0f} ms")
+        return report
+
+    def authenticate_all(self):
+        """
+        Authentifie tous les contrôleurs en parallèle.
+
+        Returns:
+            HubReport: Le résultat et la latence de chaque contrôleur.
+        """
+        return self.run([(name, None) for name in self.controllers], "authenticate")
+
+    def snapshot_all(self):
+        """
+        Lit l'état de toutes les prises de tous les contrôleurs, une requête par contrôleur.
+
+        Returns:
+            HubReport: La SensorSnapshot et la latence de chaque contrôleur.
         """
-        while self.blinking:
-            self.toggle_socket_state(socket_id)
-            time.sleep(1)
+        return self.run([(name, None) for name in self.controllers], "get_sensors_snapshot")
 
-    def stop_blinking(self):
+    def shutdown(self):
         """
-        Arrête le clignotement de la prise connectée.
+        Arrête le pool de threads sans attendre les commandes en cours.
         """
-        self.blinking = False
-        if self.blink_thread:
-            self.blink_thread.join()
-            self.blink_thread = None
\ No newline at end of file
+        self.executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,262 @@
+"""
+Banc d'essai hors ligne de la détection des carrés.
+
+Le script parcourt un dossier de vidéos et d'images enregistrées, mesure le temps de chaque
+étape de la détection (seuillage, contours, moments, approximation), le débit en images
+par seconde, les latences p50/p95/p99, et la précision par rapport à des centres annotés.
+
+Annotations : un fichier JSON portant le même nom que le média (ex. image_test.png.json) :
+    {"centroids": [[x, y], ...]}                 centres valables pour toutes les images
+    {"frames": {"0": [[x, y], ...], ...}}        centres par numéro d'image (vidéos)
+
+Exemple :
+    python benchmark_detection.py images --tracking --json resultats.json
+    python benchmark_detection.py images --baseline resultats.json --max-regression 0.1
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from detection_carres import SquareDetector, SquareTracker
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+STAGES = ("threshold", "contours", "moments", "approx")
+
+def list_media(paths):
+    """
+    Liste les vidéos et images à traiter.
+
+    Args:
+        paths (list): Des fichiers ou des dossiers.
+
+    Returns:
+        list: Les chemins des médias, triés.
+    """
+    media = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS + IMAGE_EXTENSIONS):
+                    media.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            media.append(path)
+    return media
+
+def load_ground_truth(media_path):
+    """
+    Charge les centres annotés d'un média.
+
+    Args:
+        media_path (str): Le chemin du média.
+
+    Returns:
+        dict or None: Le contenu du fichier d'annotations, ou None s'il n'existe pas.
+    """
+    label_path = media_path + ".json"
+    if not os.path.exists(label_path):
+        return None
+    with open(label_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def expected_centroids(ground_truth, index):
+    """
+    Retourne les centres annotés d'une image.
+
+    Args:
+        ground_truth (dict or None): Le contenu du fichier d'annotations.
+        index (int): Le numéro de l'image dans le média.
+
+    Returns:
+        list or None: Les centres (x, y) attendus, ou None si l'image n'est pas annotée.
+    """
+    if ground_truth is None:
+        return None
+    if "frames" in ground_truth:
+        return ground_truth["frames"].get(str(index))
+    return ground_truth.get("centroids")
+
+def read_frames(path, repeat):
+    """
+    Générateur des images d'un média.
+
+    Args:
+        path (str): Le chemin du média.
+        repeat (int): Le nombre de passages sur une image fixe, pour stabiliser les mesures.
+
+    Yields:
+        tuple: (index, frame) pour chaque image.
+    """
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Erreur lors du chargement de l'image {path}")
+            return
+        for _ in range(repeat):
+            yield 0, image
+        return
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        print(f"Erreur lors de l'ouverture de la vidéo {path}")
+        return
+    index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield index, frame
+        index += 1
+    cap.release()
+
+def match_centroids(detected, expected, tolerance):
+    """
+    Associe chaque centre annoté au centre détecté le plus proche, sans réutilisation.
+
+    Args:
+        detected (list): Les centres (x, y) détectés.
+        expected (list): Les centres (x, y) annotés.
+        tolerance (float): La distance maximale en pixels pour une association.
+
+    Returns:
+        tuple: (vrais positifs, faux positifs, faux négatifs, liste des erreurs en pixels).
+    """
+    remaining = list(detected)
+    errors = []
+    for ex, ey in expected:
+        if not remaining:
+            break
+        distances = [np.hypot(x - ex, y - ey) for x, y in remaining]
+        best = int(np.argmin(distances))
+        if distances[best] <= tolerance:
+            errors.append(distances[best])
+            remaining.pop(best)
+    tp = len(errors)
+    return tp, len(detected) - tp, len(expected) - tp, errors
+
+def benchmark(path, detector, tolerance, repeat):
+    """
+    Mesure la détection sur un média.
+
+    Args:
+        path (str): Le chemin du média.
+        detector (SquareDetector): Le détecteur à mesurer.
+        tolerance (float): La distance maximale en pixels pour une détection correcte.
+        repeat (int): Le nombre de passages sur une image fixe.
+
+    Returns:
+        dict: Les temps par étape, le débit, les percentiles de latence et la précision.
+    """
+    if hasattr(detector, "reset"):
+        detector.reset()
+    latencies = []
+    stage_totals = dict.fromkeys(STAGES, 0.0)
+    tp = fp = fn = 0
+    errors = []
+    ground_truth = load_ground_truth(path)
+
+    for index, frame in read_frames(path, repeat):
+        detector.timings = {}
+        start = time.perf_counter()
+        detections = detector.detect(frame)
+        latencies.append(time.perf_counter() - start)
+        for stage, duration in detector.timings.items():
+            stage_totals[stage] += duration
+
+        expected = expected_centroids(ground_truth, index)
+        if expected is not None:
+            result = match_centroids([d.centroid for d in detections], expected, tolerance)
+            tp, fp, fn = tp + result[0], fp + result[1], fn + result[2]
+            errors += result[3]
+    detector.timings = None
+
+    if not latencies:
+        return None
+    latencies = np.array(latencies) * 1000
+    frames = len(latencies)
+    report = {
+        "frames": frames,
+        "fps": frames / (latencies.sum() / 1000),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "stages_ms": {stage: total * 1000 / frames for stage, total in stage_totals.items()},
+    }
+    if tp + fp + fn:
+        report["accuracy"] = {
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "recall": tp / (tp + fn) if tp + fn else 0.0,
+            "mean_error_px": float(np.mean(errors)) if errors else None,
+        }
+    return report
+
+def check_regressions(results, baseline, max_regression):
+    """
+    Compare les latences p95 aux résultats d'une exécution de référence.
+
+    Args:
+        results (dict): Les résultats de l'exécution courante, par média.
+        baseline (dict): Les résultats de référence, par média.
+        max_regression (float): La hausse relative tolérée (0.1 pour 10 %).
+
+    Returns:
+        list: Les messages décrivant chaque régression.
+    """
+    regressions = []
+    for path, report in results.items():
+        reference = baseline.get(path)
+        if not reference:
+            continue
+        if report["p95_ms"] > reference["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{path} : p95 {report['p95_ms']:.2f} ms (référence {reference['p95_ms']:.2f} ms)")
+        if "accuracy" in report and "accuracy" in reference:
+            if report["accuracy"]["recall"] < reference["accuracy"]["recall"]:
+                regressions.append(f"{path} : rappel {report['accuracy']['recall']:.3f} "
+                                   f"(référence {reference['accuracy']['recall']:.3f})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de la détection des carrés.")
+    parser.add_argument("paths", nargs="*", default=["images", "image_test.png"], help="Fichiers ou dossiers de médias.")
+    parser.add_argument("--tracking", action="store_true", help="Utilise le suivi par régions d'intérêt.")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Distance maximale en pixels pour une détection correcte.")
+    parser.add_argument("--repeat", type=int, default=50, help="Nombre de passages sur chaque image fixe.")
+    parser.add_argument("--json", help="Fichier où enregistrer les résultats.")
+    parser.add_argument("--baseline", help="Résultats de référence à comparer.")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="Hausse relative du p95 tolérée.")
+    args = parser.parse_args()
+
+    detector = SquareTracker() if args.tracking else SquareDetector()
+    results = {}
+    for path in list_media(args.paths):
+        report = benchmark(path, detector, args.tolerance, args.repeat)
+        if report is None:
+            continue
+        results[path] = report
+        stages = ", ".join(f"{stage} {ms:.2f}" for stage, ms in report["stages_ms"].items())
+        print(f"{path} : {report['frames']} images, {report['fps']:.1f} img/s, "
+              f"p50 {report['p50_ms']:.2f} ms, p95 {report['p95_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms")
+        print(f"    étapes (ms/image) : {stages}")
+        if "accuracy" in report:
+            accuracy = report["accuracy"]
+            print(f"    précision {accuracy['precision']:.3f}, rappel {accuracy['recall']:.3f}, "
+                  f"erreur moyenne {accuracy['mean_error_px']} px")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = check_regressions(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"Régression : {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
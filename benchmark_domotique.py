@@ -0,0 +1,178 @@
+"""
+Banc d'essai hors ligne du client domotique, sur le faux contrôleur de mock_airos.py.
+
+Mesures :
+    - latence d'une bascule (toggle_socket_state) et nombre de requêtes HTTP par bascule ;
+    - régularité des clignotements (écart entre les changements d'état et le motif prévu) ;
+    - coût des réauthentifications sous une charge de commandes concurrentes, avec des
+      sessions qui expirent pendant la mesure.
+
+Exemple :
+    python benchmark_domotique.py --latency 0.02 --jitter 0.005 --json resultats.json
+"""
+
+import argparse
+import json
+import threading
+import time
+import numpy as np
+from api_domotique import BlinkScheduler, ConnectedSocket
+from mock_airos import MockAirOSServer
+
+def percentiles(values):
+    """
+    Résume une liste de durées en millisecondes.
+
+    Args:
+        values (list): Les durées, en secondes.
+
+    Returns:
+        dict: La moyenne et les percentiles 50, 95 et 99, en millisecondes.
+    """
+    if not values:
+        return {}
+    values = np.array(values) * 1000
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+def bench_toggle(server, toggles):
+    """
+    Mesure la latence de bascules successives d'une même prise.
+
+    Args:
+        server (MockAirOSServer): Le faux contrôleur.
+        toggles (int): Le nombre de bascules.
+
+    Returns:
+        dict: Les percentiles de latence et le nombre de requêtes par bascule.
+    """
+    socket = ConnectedSocket(base_url=server.url)
+    socket.authenticate()
+    server.reset_stats()
+
+    latencies = []
+    for _ in range(toggles):
+        start = time.perf_counter()
+        socket.toggle_socket_state(1)
+        latencies.append(time.perf_counter() - start)
+
+    requests_count = sum(server.stats[name] for name in ("get", "put", "snapshot", "login"))
+    return dict(percentiles(latencies), requests_per_toggle=requests_count / toggles)
+
+def bench_blink(server, sockets, period, duration):
+    """
+    Mesure la régularité des clignotements de plusieurs prises.
+
+    Args:
+        server (MockAirOSServer): Le faux contrôleur.
+        sockets (int): Le nombre de prises qui clignotent en même temps.
+        period (float): La durée de chaque état du motif, en secondes.
+        duration (float): La durée de la mesure, en secondes.
+
+    Returns:
+        dict: Les percentiles de l'écart absolu entre les intervalles mesurés et la période.
+    """
+    socket = ConnectedSocket(base_url=server.url)
+    socket.authenticate()
+    scheduler = BlinkScheduler(socket, workers=max(2, sockets))
+    server.reset_stats()
+
+    for socket_id in range(1, sockets + 1):
+        scheduler.start(socket_id, ((1, period), (0, period)))
+    time.sleep(duration)
+    scheduler.cancel()
+
+    deviations = []
+    for times in server.put_times.values():
+        instants = [instant for instant, _ in times]
+        deviations += [abs(b - a - period) for a, b in zip(instants, instants[1:])]
+    return dict(percentiles(deviations), changes=sum(len(times) for times in server.put_times.values()))
+
+def bench_reauth(server, workers, duration, session_lifetime):
+    """
+    Mesure les commandes concurrentes pendant que les sessions expirent.
+
+    Args:
+        server (MockAirOSServer): Le faux contrôleur.
+        workers (int): Le nombre de threads envoyant des commandes.
+        duration (float): La durée de la mesure, en secondes.
+        session_lifetime (float): La durée de vie d'une session côté serveur, en secondes.
+
+    Returns:
+        dict: Le débit, les percentiles de latence, le nombre d'authentifications et d'échecs.
+    """
+    socket = ConnectedSocket(base_url=server.url, pool_size=workers)
+    socket.authenticate()
+    server.session_lifetime = session_lifetime
+    server.reset_stats()
+
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def load(socket_id):
+        state = 0
+        while time.monotonic() < deadline:
+            state = 1 - state
+            start = time.perf_counter()
+            result = socket.toggle_socket_state(socket_id, state)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                if result is None:
+                    failures.append(socket_id)
+
+    threads = [threading.Thread(target=load, args=(socket_id % len(server.sockets) + 1,)) for socket_id in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.session_lifetime = None
+
+    return dict(
+        percentiles(latencies),
+        commands_per_s=len(latencies) / duration,
+        logins=server.stats["login"],
+        expired_responses=server.stats["expired"],
+        failures=len(failures),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai du client domotique sur un faux contrôleur.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Délai moyen de réponse du faux contrôleur, en secondes.")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Variation maximale du délai, en secondes.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses en erreur.")
+    parser.add_argument("--toggles", type=int, default=100, help="Nombre de bascules mesurées.")
+    parser.add_argument("--blink-sockets", type=int, default=4, help="Nombre de prises qui clignotent.")
+    parser.add_argument("--blink-period", type=float, default=0.25, help="Durée de chaque état du clignotement.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Durée des mesures de clignotement et de charge.")
+    parser.add_argument("--workers", type=int, default=8, help="Threads de commandes concurrentes.")
+    parser.add_argument("--session-lifetime", type=float, default=1.0, help="Durée de vie des sessions pendant la charge.")
+    parser.add_argument("--json", help="Fichier où enregistrer les résultats.")
+    args = parser.parse_args()
+
+    server = MockAirOSServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    server.start()
+    try:
+        results = {
+            "toggle": bench_toggle(server, args.toggles),
+            "blink": bench_blink(server, args.blink_sockets, args.blink_period, args.duration),
+            "reauth": bench_reauth(server, args.workers, args.duration, args.session_lifetime),
+        }
+    finally:
+        server.stop()
+
+    for name, result in results.items():
+        print(f"{name} : " + ", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                                      for key, value in result.items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
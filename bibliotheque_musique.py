@@ -0,0 +1,255 @@
+"""
+Bibliothèque musicale : titres, artistes, durées et pochettes des morceaux, conservés dans
+une base SQLite pour ne lire les étiquettes de chaque fichier qu'une seule fois.
+
+Les étiquettes sont lues avec mutagen s'il est installé ; sinon le titre est le nom du
+fichier. Un morceau n'est relu que si sa date de modification ou sa taille a changé. Les
+pochettes identiques (un même album) ne sont stockées qu'une fois.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5 import QtCore
+
+try:
+    import mutagen
+except ImportError:
+    mutagen = None
+
+Track = namedtuple("Track", ["path", "title", "artist", "duration"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    duration REAL,
+    cover TEXT REFERENCES covers(id)
+);
+CREATE TABLE IF NOT EXISTS covers (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+def read_metadata(path):
+    """
+    Lit les étiquettes d'un fichier musical.
+
+    Args:
+        path (str): Le chemin du fichier.
+
+    Returns:
+        tuple: (titre, artiste, durée en secondes ou None, pochette en octets ou None).
+    """
+    title, artist, duration, cover = os.path.splitext(os.path.basename(path))[0], "", None, None
+    if mutagen is None:
+        return title, artist, duration, cover
+    try:
+        audio = mutagen.File(path)
+    except (mutagen.MutagenError, OSError) as e:
+        print(f"Erreur lors de la lecture des étiquettes de {path} : {e}")
+        return title, artist, duration, cover
+    if audio is None:
+        return title, artist, duration, cover
+
+    duration = getattr(audio.info, "length", None)
+    tags = audio.tags
+    if tags is not None and hasattr(tags, "getall"):
+        # Étiquettes ID3 des fichiers MP3
+        frame = tags.get("TIT2")
+        if frame is not None and frame.text:
+            title = str(frame.text[0])
+        frame = tags.get("TPE1")
+        if frame is not None and frame.text:
+            artist = str(frame.text[0])
+        pictures = tags.getall("APIC")
+        if pictures:
+            cover = pictures[0].data
+    return title, artist, duration, cover
+
+class MusicLibrary(QtCore.QObject):
+    """
+    Index des morceaux d'un dossier, stocké dans une base SQLite et mis à jour en arrière-plan.
+
+    Les lectures se font dans le thread Qt ; les écritures passent par un unique thread,
+    qui émet track_updated pour chaque morceau relu.
+
+    Attributs :
+        db_path (str) : Le chemin de la base SQLite.
+        db (sqlite3.Connection) : La connexion de lecture, utilisée dans le thread Qt.
+        executor (ThreadPoolExecutor) : Le thread qui lit les étiquettes et écrit dans la base.
+        stop_event (threading.Event) : Levé par shutdown pour interrompre l'indexation en cours.
+    """
+
+    track_updated = QtCore.pyqtSignal(str)
+
+    def __init__(self, db_path):
+        """
+        Initialise la classe MusicLibrary et crée la base si elle n'existe pas.
+
+        Args:
+            db_path (str): Le chemin de la base SQLite.
+        """
+        super().__init__()
+        self.db_path = db_path
+        self.db = self._connect()
+        self.db.executescript(SCHEMA)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.stop_event = threading.Event()
+        self.writer = None
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path)
+        # Le journal WAL laisse l'interface lire pendant que le thread d'indexation écrit
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def tracks(self):
+        """
+        Retourne tous les morceaux connus.
+
+        Returns:
+            dict: Les Track, par chemin.
+        """
+        rows = self.db.execute("SELECT path, title, artist, duration FROM tracks")
+        return {row[0]: Track(*row) for row in rows}
+
+    def track(self, path):
+        """
+        Retourne un morceau.
+
+        Args:
+            path (str): Le chemin du fichier.
+
+        Returns:
+            Track or None: Le morceau, ou None s'il n'est pas encore indexé.
+        """
+        row = self.db.execute("SELECT path, title, artist, duration FROM tracks WHERE path = ?", (path,)).fetchone()
+        return Track(*row) if row else None
+
+    def cover(self, path):
+        """
+        Retourne la pochette intégrée d'un morceau.
+
+        Args:
+            path (str): Le chemin du fichier.
+
+        Returns:
+            bytes or None: L'image de la pochette, ou None s'il n'y en a pas.
+        """
+        row = self.db.execute("SELECT covers.data FROM tracks JOIN covers ON covers.id = tracks.cover "
+                              "WHERE tracks.path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, paths, complete=False):
+        """
+        Relit en arrière-plan les étiquettes des fichiers nouveaux ou modifiés.
+
+        Args:
+            paths (list): Les chemins à vérifier.
+            complete (bool, optional): Si True, paths est la liste complète du dossier et les
+                morceaux absents sont retirés de la base. Par défaut False.
+        """
+        future = self.executor.submit(self._refresh, list(paths), complete)
+        future.add_done_callback(self._report_error)
+
+    def forget(self, path):
+        """
+        Retire un morceau de la base, en arrière-plan.
+
+        Args:
+            path (str): Le chemin du fichier supprimé.
+        """
+        future = self.executor.submit(self._forget, path)
+        future.add_done_callback(self._report_error)
+
+    def shutdown(self):
+        """
+        Arrête l'indexation après le morceau en cours et annule les mises à jour en attente.
+        """
+        self.stop_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _report_error(self, future):
+        # Une erreur du thread d'indexation serait sinon perdue avec le futur
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Erreur lors de l'indexation de la musique : {future.exception()}")
+
+    def _refresh(self, paths, complete):
+        if self.writer is None:
+            self.writer = self._connect()
+        for path in paths:
+            if self.stop_event.is_set():
+                return
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Seule la ligne du fichier est lue : un ajout isolé ne parcourt pas toute la table
+            row = self.writer.execute("SELECT mtime_ns, size FROM tracks WHERE path = ?", (path,)).fetchone()
+            if row == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            title, artist, duration, cover = read_metadata(path)
+            cover_id = None
+            if cover is not None:
+                cover_id = hashlib.sha1(cover).hexdigest()
+                self.writer.execute("INSERT OR IGNORE INTO covers (id, data) VALUES (?, ?)", (cover_id, cover))
+            self.writer.execute("INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (path, stat.st_mtime_ns, stat.st_size, title, artist, duration, cover_id))
+            self.writer.commit()
+            self.track_updated.emit(path)
+
+        if complete:
+            known = {row[0] for row in self.writer.execute("SELECT path FROM tracks")}
+            for path in known - set(paths):
+                self._forget(path)
+
+    def _forget(self, path):
+        if self.writer is None:
+            self.writer = self._connect()
+        self.writer.execute("DELETE FROM tracks WHERE path = ?", (path,))
+        self.writer.execute("DELETE FROM covers WHERE id NOT IN (SELECT cover FROM tracks WHERE cover IS NOT NULL)")
+        self.writer.commit()
+
+_libraries = {}
+
+def music_library(folder):
+    """
+    Retourne la bibliothèque partagée d'un dossier de musique.
+
+    Args:
+        folder (str): Le dossier de musique.
+
+    Returns:
+        MusicLibrary: La bibliothèque, stockée dans le fichier .bibliotheque.sqlite3 du dossier.
+    """
+    folder = os.path.normpath(folder)
+    library = _libraries.get(folder)
+    if library is None:
+        library = MusicLibrary(os.path.join(folder, ".bibliotheque.sqlite3"))
+        _libraries[folder] = library
+    return library
+
+def format_track(track):
+    """
+    Met en forme un morceau pour la liste de lecture.
+
+    Args:
+        track (Track): Le morceau.
+
+    Returns:
+        str: "Titre — Artiste (m:ss)", sans les parties inconnues.
+    """
+    text = f"{track.title} — {track.artist}" if track.artist else track.title
+    if track.duration:
+        minutes, seconds = divmod(int(track.duration), 60)
+        text += f" ({minutes}:{seconds:02d})"
+    return text
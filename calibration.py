@@ -0,0 +1,166 @@
+import threading
+import numpy as np
+
+def order_corners(points):
+    """
+    Ordonne quatre points dans l'ordre des CornerSquares : haut-gauche, haut-droite, bas-gauche, bas-droite.
+
+    Args:
+        points (list): Quatre points (x, y) dans un ordre quelconque.
+
+    Returns:
+        numpy.ndarray: Tableau 4x2 des points ordonnés.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(4, 2)
+    s = points.sum(axis=1)
+    d = points[:, 0] - points[:, 1]
+    return np.array([points[np.argmin(s)], points[np.argmax(d)], points[np.argmin(d)], points[np.argmax(s)]])
+
+def perspective_transform(src, dst):
+    """
+    Calcule l'homographie qui envoie quatre points sources sur quatre points destination.
+
+    Équivalent de cv2.getPerspectiveTransform, en NumPy seul pour ne pas charger OpenCV
+    dans le processus de l'interface.
+
+    Args:
+        src (numpy.ndarray): Tableau 4x2 des points sources.
+        dst (numpy.ndarray): Tableau 4x2 des points destination.
+
+    Returns:
+        numpy.ndarray or None: La matrice 3x3, ou None si les points sont dégénérés.
+    """
+    a = np.zeros((8, 8))
+    b = np.zeros(8)
+    for i, ((x, y), (u, v)) in enumerate(zip(src, dst)):
+        a[2 * i] = [x, y, 1, 0, 0, 0, -u * x, -u * y]
+        a[2 * i + 1] = [0, 0, 0, x, y, 1, -v * x, -v * y]
+        b[2 * i] = u
+        b[2 * i + 1] = v
+    try:
+        h = np.linalg.solve(a, b)
+    except np.linalg.LinAlgError:
+        return None
+    return np.append(h, 1.0).reshape(3, 3)
+
+class ScreenCalibration:
+    """
+    Classe pour relier les coordonnées caméra aux coordonnées de la fenêtre principale
+    grâce aux quatre carrés de calibration.
+
+    L'homographie est mise en cache et n'est recalculée que lorsqu'un carré détecté
+    s'est déplacé de plus de la tolérance, ou lorsque les carrés ont bougé à l'écran.
+
+    Attributs :
+        screen_points (numpy.ndarray or None) : Les centres des CornerSquares dans la fenêtre (4x2).
+        camera_points (numpy.ndarray or None) : Les centres détectés utilisés pour le dernier calcul (4x2).
+        tolerance (float) : Le déplacement maximal en pixels caméra avant recalcul.
+        matrix (numpy.ndarray or None) : L'homographie caméra -> fenêtre en cache.
+    """
+
+    def __init__(self, screen_points=None, tolerance=3.0):
+        """
+        Initialise la classe ScreenCalibration.
+
+        Args:
+            screen_points (list, optional): Les centres des carrés dans la fenêtre, dans l'ordre des CornerSquares.
+            tolerance (float, optional): Déplacement en pixels caméra avant recalcul. Par défaut 3.0.
+        """
+        self.screen_points = None
+        self.camera_points = None
+        self.tolerance = tolerance
+        self.matrix = None
+        self.lock = threading.Lock()
+        if screen_points is not None:
+            self.set_screen_points(screen_points)
+
+    @property
+    def calibrated(self):
+        """
+        Indique si une homographie est disponible.
+        """
+        return self.matrix is not None
+
+    def set_screen_points(self, points):
+        """
+        Définit la position des carrés dans la fenêtre et force un recalcul.
+
+        Args:
+            points (list): Quatre points (x, y) dans l'ordre des CornerSquares.
+        """
+        with self.lock:
+            self.screen_points = np.asarray(points, dtype=np.float64).reshape(4, 2)
+            self._compute()
+
+    def update(self, centroids):
+        """
+        Met à jour la calibration avec les centres détectés par la caméra.
+
+        Une détection dégénérée (centres confondus ou alignés) est ignorée : l'homographie
+        précédente reste en place.
+
+        Args:
+            centroids (list): Les centres (x, y) des carrés détectés.
+
+        Returns:
+            bool: True si une homographie est disponible après la mise à jour.
+        """
+        if len(centroids) != 4:
+            return self.calibrated
+
+        camera_points = order_corners(centroids)
+        with self.lock:
+            if self.camera_points is not None:
+                moved = np.max(np.hypot(*(camera_points - self.camera_points).T))
+                if moved <= self.tolerance and self.matrix is not None:
+                    return True
+            if self.screen_points is None:
+                self.camera_points = camera_points
+                return False
+            matrix = perspective_transform(camera_points, self.screen_points)
+            if matrix is not None:
+                self.camera_points = camera_points
+                self.matrix = matrix
+            return self.matrix is not None
+
+    def _compute(self):
+        if self.screen_points is None or self.camera_points is None:
+            self.matrix = None
+            return
+        self.matrix = perspective_transform(self.camera_points, self.screen_points)
+
+    def map_point(self, x, y):
+        """
+        Convertit un point caméra en coordonnées de la fenêtre.
+
+        Args:
+            x (float): L'abscisse dans l'image caméra.
+            y (float): L'ordonnée dans l'image caméra.
+
+        Returns:
+            tuple or None: Le point (x, y) dans la fenêtre, ou None si non calibré.
+        """
+        matrix = self.matrix
+        if matrix is None:
+            return None
+        u, v, w = matrix @ (x, y, 1.0)
+        if w == 0:
+            return None
+        return (float(u / w), float(v / w))
+
+    def map_points(self, points):
+        """
+        Convertit plusieurs points caméra en coordonnées de la fenêtre.
+
+        Args:
+            points (list): Les points (x, y) dans l'image caméra.
+
+        Returns:
+            numpy.ndarray or None: Tableau Nx2 des points dans la fenêtre, ou None si non calibré.
+        """
+        matrix = self.matrix
+        if matrix is None:
+            return None
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        mapped = np.hstack([points, np.ones((len(points), 1))]) @ matrix.T
+        return mapped[:, :2] / mapped[:, 2:]
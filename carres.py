@@ -12,6 +12,7 @@ class CornerSquares:
         border_color (str) : La couleur de la bordure des carrés.
         border_width (int) : L'épaisseur de la bordure des carrés.
         squares (list) : La liste des widgets QLabel représentant les carrés.
+        position_listeners (list) : Les fonctions appelées avec les centres des carrés quand ils bougent.
     """
 
     def __init__(self, parent):
@@ -28,6 +29,7 @@ class CornerSquares:
         self.border_color = "#000000"
         self.border_width = 15
 
+        self.position_listeners = []
         self.squares = [self.create_square() for _ in range(4)]
         self.update_positions()
 
@@ -92,6 +94,35 @@ class CornerSquares:
         for square, (x, y) in zip(self.squares, positions):
             square.move(x, y)
 
+        centers = self.marker_centers()
+        for listener in self.position_listeners:
+            listener(centers)
+
+    def marker_centers(self):
+        """
+        Retourne le centre de chaque carré dans les coordonnées de la fenêtre principale.
+
+        Returns:
+            list: Les centres (x, y) dans l'ordre haut-gauche, haut-droite, bas-gauche, bas-droite.
+        """
+        window = self.parent.window()
+        half = self.square_size // 2
+        centers = []
+        for square in self.squares:
+            center = square.mapTo(window, QtCore.QPoint(half, half))
+            centers.append((center.x(), center.y()))
+        return centers
+
+    def add_position_listener(self, listener):
+        """
+        Enregistre une fonction appelée avec les centres des carrés à chaque déplacement.
+
+        Args:
+            listener (callable): Fonction prenant la liste des centres en argument.
+        """
+        self.position_listeners.append(listener)
+        listener(self.marker_centers())
+
     def resize_event(self, event):
         """
         Met à jour la position des carrés lorsque le parent est redimensionné.
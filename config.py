@@ -4,6 +4,11 @@ Ce fichier contient les configurations pour les contacts et les messages prédé
 Attributs:
     contacts (dict): Un dictionnaire contenant les noms des contacts comme clés et leurs ID Discord comme valeurs.
     messages (list): Une liste de messages prédéfinis que l'utilisateur peut envoyer.
+    controllers (dict): Les contrôleurs de prises connectées, par nom, avec leur adresse et leurs identifiants.
+    rooms (dict): Les prises de chaque pièce, sous forme de tuples (contrôleur, ID de prise, type).
+    vision_source (int, str or None): La caméra (index) ou la vidéo utilisée pour détecter les carrés
+        de calibration, ou None pour ne pas lancer la détection.
+    history_path (str): Le dossier où l'historique des conversations Discord est conservé.
 """
 # Liste des contacts avec leur ID Discord
 contacts = {
@@ -16,4 +21,20 @@ messages = [
     "J'ai besoin d'aide.", "J'ai faim.", "J'ai soif.", "J'ai besoin d'aller aux toilettes.",
     "J’ai envie de discuter.", "Je ne me sens pas bien !", "Peux-tu me mettre au lit ?",
     "J'ai besoin d'envoyer un message, peux-tu m'aider ?"
-]
\ No newline at end of file
+]
+
+# Contrôleurs de prises connectées (un ou plusieurs par étage)
+controllers = {
+    "chambre": {"base_url": "http://10.10.195.32", "username": "ubnt", "password": "ubnt", "timeout": 3},
+}
+
+# Prises de chaque pièce : (contrôleur, ID de prise, type)
+rooms = {
+    "chambre": [("chambre", 6, "lumiere"), ("chambre", 5, "alarme")],
+}
+
+# Source de la détection des carrés de calibration : index de caméra, chemin de vidéo, ou None
+vision_source = None
+
+# Dossier de l'historique des conversations (journal et index, non versionnés)
+history_path = "historique"
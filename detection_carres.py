@@ -1,114 +1,856 @@
 import cv2
 import numpy as np
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+# Détection --------------------------------------------------------
+Detection = namedtuple("Detection", ["centroid", "corners", "area", "confidence"])
+Detection.__doc__ = """
+Résultat compact de la détection d'un carré.
+
+Attributs :
+    centroid (tuple) : Le centre (x, y) du carré, en pixels.
+    corners (tuple) : Les quatre sommets ((x, y), ...) du polygone approché.
+    area (float) : L'aire du contour, en pixels carrés.
+    confidence (float) : Score entre 0 et 1 indiquant à quel point le contour ressemble à un carré.
+"""
+
+def filter_candidates(contours, min_area, min_aspect, min_fill):
+    """
+    Présélectionne en une seule passe NumPy les contours pouvant être des carrés.
+
+    L'aire et le centre de chaque contour sont calculés par la formule du lacet
+    (les mêmes valeurs que cv2.moments), et le rectangle englobant par des réductions
+    par segment, sans boucle Python sur les contours.
+
+    Args:
+        contours (tuple): Les contours renvoyés par cv2.findContours.
+        min_area (float): Aire minimale d'un contour.
+        min_aspect (float): Rapport minimal largeur/hauteur du rectangle englobant.
+        min_fill (float): Rapport minimal entre l'aire du contour et celle du rectangle englobant.
+
+    Returns:
+        list: Liste de tuples (index, aire, (cX, cY)) pour chaque contour retenu.
+    """
+    if len(contours) == 0:
+        return []
+
+    lengths = np.fromiter((len(c) for c in contours), dtype=np.intp, count=len(contours))
+    points = np.concatenate(contours).reshape(-1, 2).astype(np.float64)
+    starts = np.zeros(len(contours), dtype=np.intp)
+    np.cumsum(lengths[:-1], out=starts[1:])
+
+    # Point suivant de chaque sommet, le dernier sommet d'un contour rebouclant sur le premier
+    following = np.arange(1, len(points) + 1)
+    following[starts + lengths - 1] = starts
+    x, y = points[:, 0], points[:, 1]
+    xn, yn = x[following], y[following]
+
+    cross = x * yn - xn * y
+    double_area = np.add.reduceat(cross, starts)
+    area = np.abs(double_area) / 2
+
+    w = np.maximum.reduceat(x, starts) - np.minimum.reduceat(x, starts) + 1
+    h = np.maximum.reduceat(y, starts) - np.minimum.reduceat(y, starts) + 1
+    aspect = np.minimum(w, h) / np.maximum(w, h)
+    fill = area / (w * h)
+
+    keep = np.flatnonzero((lengths >= 4) & (area >= max(min_area, 1e-9)) & (aspect >= min_aspect) & (fill >= min_fill))
+    if len(keep) == 0:
+        return []
+
+    cX = np.add.reduceat((x + xn) * cross, starts)[keep] / (3 * double_area[keep])
+    cY = np.add.reduceat((y + yn) * cross, starts)[keep] / (3 * double_area[keep])
+    return [(int(i), float(a), (float(cx), float(cy))) for i, a, cx, cy in zip(keep, area[keep], cX, cY)]
+
+class SquareDetector:
+    """
+    Détecteur de carrés sans interface graphique, utilisable depuis n'importe quel module.
+
+    Attributs :
+        epsilon (float) : Tolérance de l'approximation polygonale, relative au périmètre.
+        min_area (float) : Aire minimale d'un contour pour être retenu.
+        min_aspect (float) : Rapport minimal largeur/hauteur du rectangle englobant.
+        min_fill (float) : Taux de remplissage minimal du rectangle englobant.
+        timings (dict or None) : Si défini, cumule le temps passé dans chaque étape
+            ("threshold", "contours", "moments", "approx"), en secondes.
+    """
+
+    def __init__(self, epsilon=0.02, min_area=25, min_aspect=0.5, min_fill=0.45):
+        """
+        Initialise la classe SquareDetector.
+
+        Args:
+            epsilon (float, optional): Tolérance de l'approximation polygonale. Par défaut 0.02.
+            min_area (float, optional): Aire minimale d'un contour. Par défaut 25.
+            min_aspect (float, optional): Rapport minimal des côtés du rectangle englobant. Par défaut 0.5.
+            min_fill (float, optional): Remplissage minimal du rectangle englobant. Par défaut 0.45,
+                ce qui laisse passer un carré tourné de 45° (remplissage 0.5).
+        """
+        self.epsilon = epsilon
+        self.min_area = min_area
+        self.min_aspect = min_aspect
+        self.min_fill = min_fill
+        self.timings = None
+
+    def _tick(self, stage, start):
+        """
+        Ajoute le temps écoulé depuis start à l'étape donnée, si la mesure est activée.
+
+        Args:
+            stage (str): Le nom de l'étape.
+            start (float): L'instant de début de l'étape (time.perf_counter).
+
+        Returns:
+            float: L'instant courant, début de l'étape suivante.
+        """
+        now = time.perf_counter()
+        if self.timings is not None:
+            self.timings[stage] = self.timings.get(stage, 0.0) + now - start
+        return now
+
+    def detect(self, frame, offset=(0, 0)):
+        """
+        Détecte les carrés présents dans une image.
+
+        Args:
+            frame (numpy.ndarray): L'image BGR ou en niveaux de gris à analyser.
+            offset (tuple, optional): Décalage (x, y) ajouté aux coordonnées, utile quand
+                frame est une région découpée d'une image plus grande. Par défaut (0, 0).
+
+        Returns:
+            list: La liste des Detection trouvées dans l'image.
+        """
+        start = time.perf_counter()
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        _, th2 = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        start = self._tick("threshold", start)
+        contours, _ = cv2.findContours(th2, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=offset)
+        start = self._tick("contours", start)
+
+        candidates = filter_candidates(contours, self.min_area, self.min_aspect, self.min_fill)
+        start = self._tick("moments", start)
+        detections = []
+        for index, area, centroid in candidates:
+            detection = self._to_detection(contours[index], area, centroid)
+            if detection is not None:
+                detections.append(detection)
+        self._tick("approx", start)
+        return detections
+
+    def _to_detection(self, contour, area, centroid):
+        """
+        Convertit un contour candidat en Detection s'il s'agit d'un quadrilatère.
+
+        Args:
+            contour (numpy.ndarray): Le contour renvoyé par cv2.findContours.
+            area (float): L'aire du contour calculée par filter_candidates.
+            centroid (tuple): Le centre (x, y) calculé par filter_candidates.
+
+        Returns:
+            Detection or None: La détection, ou None si le contour n'est pas un carré.
+        """
+        epsilon = self.epsilon * cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, epsilon, True)
+        if len(approx) != 4:
+            return None
+
+        # Confiance : remplissage du rectangle englobant orienté et rapport des côtés
+        (_, _), (w, h), _ = cv2.minAreaRect(contour)
+        if w == 0 or h == 0:
+            return None
+        fill = min(area / (w * h), 1.0)
+        ratio = min(w, h) / max(w, h)
+
+        corners = tuple((int(x), int(y)) for x, y in approx.reshape(4, 2))
+        return Detection(centroid, corners, area, fill * ratio)
+
+    def stream(self, source, workers=None, drop_policy="latest"):
+        """
+        Générateur headless : lit une source vidéo et renvoie les détections de chaque image.
+
+        Args:
+            source (str or int): Le chemin de la vidéo ou l'index de la caméra.
+            workers (int, optional): Nombre de threads de détection.
+            drop_policy (str, optional): Politique d'abandon des images ("latest" ou "block").
+
+        Yields:
+            tuple: (seq, detections) pour chaque image traitée.
+        """
+        pipeline = FramePipeline(source, detect=self.detect, workers=workers, drop_policy=drop_policy)
+        if not pipeline.start():
+            return
+        try:
+            for seq, _, _, detections in pipeline.results():
+                yield seq, detections
+        finally:
+            pipeline.stop()
+
+class SquareTracker(SquareDetector):
+    """
+    Détecteur avec suivi : une fois les carrés de calibration trouvés sur l'image entière,
+    seules de petites régions autour de leur dernière position sont analysées.
+
+    Une recherche sur l'image entière n'est relancée que lorsque le suivi est perdu
+    pendant plusieurs images consécutives.
+
+    Attributs :
+        count (int) : Le nombre de carrés à suivre (les quatre CornerSquares).
+        margin (float) : La marge ajoutée autour de chaque carré, relative à sa taille.
+        max_misses (int) : Le nombre d'images sans les carrés avant de considérer le suivi perdu.
+        min_confidence (float) : La confiance minimale d'un carré pour l'accrochage.
+        markers (list or None) : Les dernières Detection suivies, None tant que le suivi n'est pas accroché.
+        misses (int) : Le nombre d'images consécutives où des carrés manquaient.
+    """
+
+    def __init__(self, count=4, margin=0.5, max_misses=3, min_confidence=0.7, **kwargs):
+        """
+        Initialise la classe SquareTracker.
+
+        Args:
+            count (int, optional): Nombre de carrés à suivre. Par défaut 4.
+            margin (float, optional): Marge autour de chaque carré. Par défaut 0.5.
+            max_misses (int, optional): Images manquées avant réacquisition. Par défaut 3.
+            min_confidence (float, optional): Confiance minimale pour l'accrochage. Par défaut 0.7.
+            **kwargs: Paramètres transmis à SquareDetector.
+        """
+        super().__init__(**kwargs)
+        self.count = count
+        self.margin = margin
+        self.max_misses = max_misses
+        self.min_confidence = min_confidence
+        self.markers = None
+        self.misses = 0
+        # Les threads de détection du pipeline partagent le même état de suivi
+        self.lock = threading.Lock()
+
+    @property
+    def locked(self):
+        """
+        Indique si le suivi est accroché sur les carrés.
+        """
+        return self.markers is not None
+
+    def reset(self):
+        """
+        Force une recherche sur l'image entière à la prochaine image.
+        """
+        with self.lock:
+            self.markers = None
+            self.misses = 0
+
+    def detect(self, frame, offset=(0, 0)):
+        """
+        Détecte les carrés suivis, dans les régions d'intérêt si le suivi est accroché.
+
+        Args:
+            frame (numpy.ndarray): L'image BGR ou en niveaux de gris à analyser.
+            offset (tuple, optional): Décalage (x, y) ajouté aux coordonnées. Par défaut (0, 0).
+
+        Returns:
+            list: La liste des Detection trouvées.
+        """
+        with self.lock:
+            markers = self.markers
+        if markers is None:
+            return self._acquire(frame, offset)
+        return self._track(frame, markers, offset)
+
+    def _acquire(self, frame, offset):
+        detections = super().detect(frame, offset)
+        candidates = [d for d in detections if d.confidence >= self.min_confidence]
+        if len(candidates) < self.count:
+            return detections
+
+        markers = sorted(candidates, key=lambda d: d.confidence, reverse=True)[:self.count]
+        with self.lock:
+            self.markers = markers
+            self.misses = 0
+        return markers
+
+    def _track(self, frame, markers, offset):
+        height, width = frame.shape[:2]
+        found = []
+        for marker in markers:
+            x0, y0, x1, y1 = self._roi(marker, width, height, offset)
+            roi_offset = (x0 + offset[0], y0 + offset[1])
+            candidates = super().detect(frame[y0:y1, x0:x1], roi_offset)
+            if candidates:
+                mX, mY = marker.centroid
+                found.append(min(candidates, key=lambda d: (d.centroid[0] - mX) ** 2 + (d.centroid[1] - mY) ** 2))
+
+        with self.lock:
+            if len(found) == len(markers):
+                self.markers = found
+                self.misses = 0
+            else:
+                self.misses += 1
+                if self.misses >= self.max_misses:
+                    self.markers = None
+        return found
+
+    def _roi(self, marker, width, height, offset):
+        """
+        Calcule la région d'intérêt autour d'un carré suivi.
+
+        Args:
+            marker (Detection): La dernière détection du carré.
+            width (int): La largeur de l'image.
+            height (int): La hauteur de l'image.
+            offset (tuple): Le décalage (x, y) de l'image.
+
+        Returns:
+            tuple: Les bornes (x0, y0, x1, y1) de la région dans l'image.
+        """
+        corners = np.array(marker.corners) - offset
+        x0, y0 = corners.min(axis=0)
+        x1, y1 = corners.max(axis=0)
+        pad = int(max(x1 - x0, y1 - y0) * self.margin) + 1
+        return (max(int(x0) - pad, 0), max(int(y0) - pad, 0),
+                min(int(x1) + pad + 1, width), min(int(y1) + pad + 1, height))
+
+def draw_detections(frame, detections):
+    """
+    Dessine les carrés détectés et leurs centres sur l'image.
+
+    Args:
+        frame (numpy.ndarray): L'image sur laquelle dessiner.
+        detections (list): La liste des Detection renvoyée par SquareDetector.detect.
+    """
+    for detection in detections:
+        cX, cY = int(detection.centroid[0]), int(detection.centroid[1])
+        cv2.polylines(frame, [np.array(detection.corners, dtype=np.int32)], True, (0, 255, 0), 2)
+        cv2.circle(frame, (cX, cY), 5, (255, 0, 0), -1)
+        cv2.putText(frame, f"({cX}, {cY})", (cX - 50, cY - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+# Contrôle adaptatif -----------------------------------------------
+def scale_detection(detection, factor):
+    """
+    Ramène une Detection calculée sur une image réduite à la résolution d'origine.
+
+    Args:
+        detection (Detection): La détection sur l'image réduite.
+        factor (float): Le rapport résolution d'origine / résolution réduite.
+
+    Returns:
+        Detection: La détection en coordonnées pleine résolution.
+    """
+    cX, cY = detection.centroid
+    corners = tuple((int(x * factor), int(y * factor)) for x, y in detection.corners)
+    return Detection((cX * factor, cY * factor), corners, detection.area * factor * factor, detection.confidence)
+
+class AdaptiveController:
+    """
+    Contrôleur de la boucle de vision : détection sur une image réduite, raffinement
+    des centres en pleine résolution à l'intérieur des carrés trouvés, et cadence
+    adaptée à un budget CPU ou à une échéance par image.
+
+    Les images arrivant avant la fin du délai imposé par le budget ne sont pas analysées :
+    les dernières détections sont renvoyées à la place, ce qui laisse le processeur
+    à l'interface Qt, à la musique et au bot Discord.
+
+    Attributs :
+        detector (SquareDetector) : Le détecteur appliqué à l'image réduite.
+        refiner (SquareDetector) : Le détecteur appliqué aux régions pleine résolution.
+        scale (float) : Le facteur de réduction courant.
+        min_scale (float) : Le facteur de réduction minimal.
+        max_scale (float) : Le facteur de réduction maximal.
+        cpu_budget (float) : La fraction d'un cœur que la vision peut utiliser.
+        frame_deadline (float or None) : Le temps maximal de traitement d'une image, en secondes.
+        refine (bool) : Indique si les centres sont raffinés en pleine résolution.
+        cost (float) : La moyenne glissante du temps CPU par image analysée, en secondes.
+        latency (float) : La moyenne glissante du temps réel par image analysée, en secondes.
+        processed (int) : Le nombre d'images analysées.
+        skipped (int) : Le nombre d'images sautées.
+    """
+
+    def __init__(self, detector=None, scale=0.5, min_scale=0.25, max_scale=1.0,
+                 cpu_budget=0.5, frame_deadline=None, refine=True, fps_window=2.0):
+        """
+        Initialise la classe AdaptiveController.
+
+        Args:
+            detector (SquareDetector, optional): Détecteur de l'image réduite. Par défaut SquareDetector().
+            scale (float, optional): Facteur de réduction initial. Par défaut 0.5.
+            min_scale (float, optional): Facteur de réduction minimal. Par défaut 0.25.
+            max_scale (float, optional): Facteur de réduction maximal. Par défaut 1.0.
+            cpu_budget (float, optional): Fraction d'un cœur allouée à la vision. Par défaut 0.5.
+            frame_deadline (float, optional): Temps maximal par image, en secondes. Par défaut None.
+            refine (bool, optional): Raffine les centres en pleine résolution. Par défaut True.
+            fps_window (float, optional): Fenêtre de mesure du débit effectif, en secondes. Par défaut 2.0.
+        """
+        self.detector = detector or SquareDetector()
+        self.refiner = SquareDetector()
+        self.scale = scale
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.cpu_budget = cpu_budget
+        self.frame_deadline = frame_deadline
+        self.refine = refine
+        self.fps_window = fps_window
+
+        self.cost = 0.0
+        self.latency = 0.0
+        self.processed = 0
+        self.skipped = 0
+        self.next_time = 0.0
+        self.last_detections = []
+        self.timestamps = deque()
+        self.lock = threading.Lock()
+
+    @property
+    def effective_fps(self):
+        """
+        Retourne le nombre d'images réellement analysées par seconde sur la fenêtre de mesure.
+        """
+        with self.lock:
+            self._trim(time.perf_counter())
+            return len(self.timestamps) / self.fps_window
+
+    def _trim(self, now):
+        while self.timestamps and now - self.timestamps[0] > self.fps_window:
+            self.timestamps.popleft()
+
+    def process(self, frame):
+        """
+        Analyse une image si le budget le permet.
+
+        Args:
+            frame (numpy.ndarray): L'image BGR pleine résolution.
+
+        Returns:
+            list: Les Detection en coordonnées pleine résolution, ou les dernières
+                détections si l'image a été sautée.
+        """
+        now = time.perf_counter()
+        with self.lock:
+            if now < self.next_time:
+                self.skipped += 1
+                return self.last_detections
+            # Réserve le créneau pour que les autres threads sautent leur image
+            self.next_time = now + self.cost / self.cpu_budget
+            scale = self.scale
+
+        start_cpu = time.thread_time()
+        detections = self._detect(frame, scale)
+        cost = time.thread_time() - start_cpu
+        end = time.perf_counter()
+
+        with self.lock:
+            self.cost = cost if self.processed == 0 else 0.8 * self.cost + 0.2 * cost
+            self.latency = (end - now) if self.processed == 0 else 0.8 * self.latency + 0.2 * (end - now)
+            self.processed += 1
+            self.next_time = now + self.cost / self.cpu_budget
+            self.last_detections = detections
+            self.timestamps.append(end)
+            self._trim(end)
+            self._adapt_scale()
+        return detections
+
+    def _adapt_scale(self):
+        """
+        Réduit la résolution d'analyse si l'échéance est dépassée, l'augmente s'il reste de la marge.
+        """
+        if self.frame_deadline is None:
+            return
+        previous = self.scale
+        if self.latency > self.frame_deadline:
+            self.scale = max(self.min_scale, self.scale * 0.8)
+        elif self.latency < 0.5 * self.frame_deadline:
+            self.scale = min(self.max_scale, self.scale * 1.1)
+        if self.scale != previous and hasattr(self.detector, "reset"):
+            # Les régions suivies sont exprimées dans l'ancienne résolution
+            self.detector.reset()
+
+    def _detect(self, frame, scale):
+        if scale >= 1.0:
+            return self.detector.detect(frame)
+
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        detections = [scale_detection(d, 1.0 / scale) for d in self.detector.detect(small)]
+        if not self.refine:
+            return detections
+        return [self._refine(frame, d, scale) for d in detections]
+
+    def _refine(self, frame, detection, scale):
+        """
+        Recalcule une détection en pleine résolution à l'intérieur de son carré.
+
+        Args:
+            frame (numpy.ndarray): L'image pleine résolution.
+            detection (Detection): La détection mise à l'échelle depuis l'image réduite.
+            scale (float): Le facteur de réduction utilisé.
+
+        Returns:
+            Detection: La détection raffinée, ou celle d'origine si le raffinement échoue.
+        """
+        height, width = frame.shape[:2]
+        corners = np.array(detection.corners)
+        pad = int(2 / scale) + 1
+        x0, y0 = np.maximum(corners.min(axis=0) - pad, 0)
+        x1, y1 = corners.max(axis=0) + pad + 1
+        x1, y1 = min(x1, width), min(y1, height)
+        candidates = self.refiner.detect(frame[y0:y1, x0:x1], (int(x0), int(y0)))
+        if not candidates:
+            return detection
+        # Le carré le plus grand de la région est le carré lui-même, pas un détail intérieur
+        return max(candidates, key=lambda d: d.area)
+
+    def get_metrics(self):
+        """
+        Retourne l'état du contrôleur.
+
+        Returns:
+            dict: Débit effectif, coût moyen, latence moyenne, facteur de réduction et compteurs.
+        """
+        fps = self.effective_fps
+        with self.lock:
+            return {
+                "effective_fps": fps,
+                "cost": self.cost,
+                "latency": self.latency,
+                "scale": self.scale,
+                "processed": self.processed,
+                "skipped": self.skipped,
+            }
+
+# Pipeline ---------------------------------------------------------
+class StageMetrics:
+    """
+    Compteurs d'une étape du pipeline, partagés entre threads.
+
+    Attributs :
+        name (str) : Le nom de l'étape.
+        processed (int) : Le nombre d'éléments traités par l'étape.
+        dropped (int) : Le nombre d'images abandonnées à l'entrée de l'étape.
+        busy_time (float) : Le temps cumulé passé à traiter, en secondes.
+        max_depth (int) : La profondeur maximale observée de la file d'entrée.
+    """
+
+    def __init__(self, name, input_queue=None):
+        self.name = name
+        self.input_queue = input_queue
+        self.processed = 0
+        self.dropped = 0
+        self.busy_time = 0.0
+        self.max_depth = 0
+        self.lock = threading.Lock()
+
+    def record(self, duration):
+        with self.lock:
+            self.processed += 1
+            self.busy_time += duration
+
+    def record_drop(self):
+        with self.lock:
+            self.dropped += 1
+
+    def record_depth(self):
+        if self.input_queue is None:
+            return
+        depth = self.input_queue.qsize()
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+
+    def snapshot(self):
+        """
+        Retourne une copie des compteurs de l'étape.
+
+        Returns:
+            dict: Les compteurs courants, dont la profondeur actuelle de la file d'entrée.
+        """
+        with self.lock:
+            return {
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "busy_time": self.busy_time,
+                "queue_depth": self.input_queue.qsize() if self.input_queue is not None else 0,
+                "max_queue_depth": self.max_depth,
+            }
+
+class FramePipeline:
+    """
+    Pipeline multi-thread de détection : un thread de capture, un groupe borné de threads
+    de détection et une étape de rendu consommée par l'appelant.
+
+    OpenCV libère le GIL pendant le seuillage et la recherche de contours, les threads
+    de détection s'exécutent donc réellement en parallèle.
+
+    Attributs :
+        source (str or int) : Le chemin de la vidéo ou l'index de la caméra.
+        detect (callable) : La fonction de détection appliquée à chaque image.
+        workers (int) : Le nombre de threads de détection.
+        drop_policy (str) : "latest" pour ne garder que les images les plus récentes
+            quand une file est pleine, "block" pour ralentir la capture.
+        frame_queue (Queue) : La file entre la capture et la détection.
+        result_queue (Queue) : La file entre la détection et le rendu.
+        metrics (dict) : Les compteurs de chaque étape ("capture", "detection", "render").
+    """
+
+    DROP_POLICIES = ("latest", "block")
+
+    def __init__(self, source, detect=None, workers=None, queue_size=2, drop_policy="latest"):
+        """
+        Initialise la classe FramePipeline.
+
+        Args:
+            source (str or int): Le chemin de la vidéo ou l'index de la caméra.
+            detect (callable, optional): Fonction frame -> résultats. Par défaut SquareDetector().detect.
+            workers (int, optional): Nombre de threads de détection. Par défaut le nombre de cœurs moins un.
+            queue_size (int, optional): Taille maximale de chaque file. Par défaut 2.
+            drop_policy (str, optional): "latest" ou "block". Par défaut "latest".
+        """
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Politique d'abandon inconnue : {drop_policy}")
+
+        self.source = source
+        self.detect = detect or SquareDetector().detect
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.drop_policy = drop_policy
+
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+        self.metrics = {
+            "capture": StageMetrics("capture"),
+            "detection": StageMetrics("detection", self.frame_queue),
+            "render": StageMetrics("render", self.result_queue),
+        }
+
+        self.running = False
+        self.threads = []
+        self.finished_workers = 0
+        self.finished_lock = threading.Lock()
+        self.last_seq = -1
+
+    def start(self):
+        """
+        Ouvre la source vidéo et démarre les threads de capture et de détection.
+
+        Returns:
+            bool: True si la source a pu être ouverte, False sinon.
+        """
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            print("Erreur lors de l'ouverture de la vidéo")
+            return False
+
+        self.running = True
+        self.finished_workers = 0
+        self.last_seq = -1
+        self.threads = [threading.Thread(target=self._capture, args=(cap,), daemon=True)]
+        self.threads += [threading.Thread(target=self._detect, daemon=True) for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        """
+        Arrête le pipeline et attend la fin des threads.
+        """
+        self.running = False
+        # Vide les files pour débloquer les threads en attente
+        for q in (self.frame_queue, self.result_queue):
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self.threads = []
+
+    def _put(self, q, item, stage):
+        """
+        Dépose un élément dans une file en appliquant la politique d'abandon.
+
+        Args:
+            q (Queue): La file de destination.
+            item (tuple): L'élément à déposer.
+            stage (StageMetrics): Les compteurs de l'étape qui consomme la file.
+        """
+        if self.drop_policy == "block":
+            while self.running:
+                try:
+                    q.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+        else:
+            # La plus récente l'emporte : on retire l'élément le plus ancien
+            while True:
+                try:
+                    q.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                        stage.record_drop()
+                    except queue.Empty:
+                        pass
+        stage.record_depth()
+
+    def _put_sentinel(self, q):
+        # Les marqueurs de fin ne sont jamais abandonnés
+        while self.running:
+            try:
+                q.put(None, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _capture(self, cap):
+        seq = 0
+        metrics = self.metrics["capture"]
+        while self.running and cap.isOpened():
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamp = time.monotonic()
+            metrics.record(time.perf_counter() - start)
+            self._put(self.frame_queue, (seq, timestamp, frame), self.metrics["detection"])
+            seq += 1
+        cap.release()
+        for _ in range(self.workers):
+            self._put_sentinel(self.frame_queue)
+
+    def _detect(self):
+        metrics = self.metrics["detection"]
+        while self.running:
+            try:
+                item = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                with self.finished_lock:
+                    self.finished_workers += 1
+                return
+            seq, timestamp, frame = item
+            start = time.perf_counter()
+            result = self.detect(frame)
+            metrics.record(time.perf_counter() - start)
+            self._put(self.result_queue, (seq, timestamp, frame, result), self.metrics["render"])
+
+    def results(self):
+        """
+        Générateur de l'étape de rendu : renvoie les résultats dans l'ordre des images.
+
+        Avec la politique "latest", un résultat plus ancien que le dernier renvoyé est
+        abandonné : la latence reste constante même quand un thread de détection prend du
+        retard. Avec "block", toutes les images sont renvoyées : les résultats arrivés en
+        avance sont gardés jusqu'à ce que les précédents soient prêts.
+
+        Yields:
+            tuple: (seq, timestamp, frame, result) pour chaque image traitée, timestamp étant
+                l'instant de capture selon time.monotonic.
+        """
+        metrics = self.metrics["render"]
+        pending = {}
+        while self.running:
+            try:
+                item = self.result_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.finished_workers == self.workers:
+                    break
+                continue
+
+            if self.drop_policy == "block":
+                pending[item[0]] = item
+                ready = []
+                while self.last_seq + 1 in pending:
+                    self.last_seq += 1
+                    ready.append(pending.pop(self.last_seq))
+            elif item[0] <= self.last_seq:
+                metrics.record_drop()
+                continue
+            else:
+                self.last_seq = item[0]
+                ready = [item]
+
+            for item in ready:
+                start = time.perf_counter()
+                yield item
+                metrics.record(time.perf_counter() - start)
+
+    def get_metrics(self):
+        """
+        Retourne les compteurs de chaque étape du pipeline.
+
+        Returns:
+            dict: Un dictionnaire {nom de l'étape: compteurs}.
+        """
+        return {name: stage.snapshot() for name, stage in self.metrics.items()}
 
 # Vidéo ------------------------------------------------------------
-def process_video(video_path):
+def process_video(video_path, workers=None, drop_policy="latest", tracking=False, cpu_budget=None):
     """
     Traite une vidéo pour détecter les contours et dessiner des carrés avec leurs centres.
 
+    La capture et la détection tournent dans des threads séparés, l'affichage reste
+    dans le thread principal comme l'exige cv2.imshow.
+
     Args:
         video_path (str): Le chemin vers le fichier vidéo.
+        workers (int, optional): Nombre de threads de détection.
+        drop_policy (str, optional): Politique d'abandon des images ("latest" ou "block").
+        tracking (bool, optional): Si True, ne recherche les carrés qu'autour de leur dernière position.
+        cpu_budget (float, optional): Si défini, fraction d'un cœur allouée à la détection, qui se fait
+            alors sur une image réduite avec une cadence adaptée (voir AdaptiveController).
     """
-    cap = cv2.VideoCapture(video_path)
-
-    if not cap.isOpened():
-        print("Erreur lors de l'ouverture de la vidéo")
+    detector = SquareTracker() if tracking else SquareDetector()
+    controller = None
+    detect = detector.detect
+    if cpu_budget is not None:
+        controller = AdaptiveController(detector, cpu_budget=cpu_budget)
+        detect = controller.process
+    pipeline = FramePipeline(video_path, detect=detect, workers=workers, drop_policy=drop_policy)
+    if not pipeline.start():
         return
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if ret:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            _, th2 = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            contours, _ = cv2.findContours(th2, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            for contour in contours:
-                epsilon = 0.02 * cv2.arcLength(contour, True)
-                approx = cv2.approxPolyDP(contour, epsilon, True)
-                
-                if len(approx) == 4:
-                    cv2.drawContours(frame, [contour], 0, (0, 255, 0), 2)
-                    
-                    M = cv2.moments(contour)
-                    if M['m00'] != 0:
-                        cX = int(M['m10'] / M['m00'])
-                        cY = int(M['m01'] / M['m00'])
-                    else:
-                        cX, cY = 0, 0
-
-                    cv2.circle(frame, (cX, cY), 5, (255, 0, 0), -1)
-                    cv2.putText(frame, f"({cX}, {cY})", (cX - 50, cY - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
+    try:
+        for _, _, frame, detections in pipeline.results():
+            draw_detections(frame, detections)
             cv2.imshow('Video', frame)
-            
+
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
-        else:
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
-
-# Appel de la fonction pour traiter la vidéo
-process_video('/Users/clementine/Desktop/test_bouton.mp4')
+    finally:
+        pipeline.stop()
+        cv2.destroyAllWindows()
 
+    for name, stage in pipeline.get_metrics().items():
+        print(f"{name} : {stage}")
+    if controller is not None:
+        print(f"adaptatif : {controller.get_metrics()}")
 
 # Image ------------------------------------------------------------
-"""
 def process_image(image_path):
-    \"""
+    """
     Traite une image pour détecter les contours et dessiner des carrés avec leurs centres.
 
     Args:
         image_path (str): Le chemin vers le fichier image.
-    \"""
-    # Charger l'image à partir du fichier
+    """
     image = cv2.imread(image_path)
-
-    # Vérifier si l'image a bien été chargée
     if image is None:
         print("Erreur lors du chargement de l'image")
         return
 
-    # Convertir l'image en niveaux de gris
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-    # Appliquer un seuillage d'Otsu pour binariser l'image
-    _, th2 = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-
-    # Trouver les contours dans l'image binaire
-    contours, _ = cv2.findContours(th2, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    # Parcourir les contours trouvés
-    for contour in contours:
-        epsilon = 0.05 * cv2.arcLength(contour, True)
-        approx = cv2.approxPolyDP(contour, epsilon, True)
-        
-        # Si le contour a 4 sommets, il s'agit d'un carré
-        if len(approx) == 4:
-            cv2.drawContours(image, [contour], 0, (0, 255, 0), 2)
-            
-            # Calculer les moments pour obtenir le centre du carré
-            M = cv2.moments(contour)
-            if M['m00'] != 0:
-                cX = int(M['m10'] / M['m00'])
-                cY = int(M['m01'] / M['m00'])
-            else:
-                cX, cY = 0, 0
-
-            # Dessiner un cercle au centre du carré et afficher les coordonnées
-            cv2.circle(image, (cX, cY), 5, (255, 0, 0), -1)
-            cv2.putText(image, f"({cX}, {cY})", (cX - 50, cY - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-
-    # Afficher l'image avec les carrés détectés et leurs centres
+    draw_detections(image, SquareDetector().detect(image))
     cv2.imshow('Image', image)
 
     # Attendre une touche pour fermer la fenêtre
     cv2.waitKey(0)
     cv2.destroyAllWindows()
 
-# Appel de la fonction pour traiter l'image
-process_image('/Users/clementine/Desktop/test.png')
-"""
\ No newline at end of file
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else '/Users/clementine/Desktop/test_bouton.mp4'
+    if path.lower().endswith((".png", ".jpg", ".jpeg")):
+        process_image(path)
+    else:
+        process_video(path)
@@ -0,0 +1,384 @@
+"""
+Historique persistant des conversations Discord et son affichage virtualisé.
+
+Les messages sont ajoutés à la fin d'un journal (une ligne JSON par message) et repérés
+par un index binaire à enregistrements de taille fixe : l'accès au n-ième message, la
+recherche par date et la liste des messages d'un contact ne lisent que les quelques
+octets nécessaires, quelle que soit la taille de l'historique.
+
+Fichiers du dossier d'historique :
+    messages.log            journal des messages, en ajout seul
+    messages.idx            (horodatage, position, longueur) de chaque message
+    contacts/<contact>.idx  numéros des messages de chaque contact
+"""
+
+import json
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from PyQt5 import QtCore, QtWidgets
+
+Message = namedtuple("Message", ["timestamp", "contact", "direction", "text"])
+
+# Enregistrements de l'index global et des index par contact
+INDEX_RECORD = struct.Struct("<dQI")
+CONTACT_RECORD = struct.Struct("<I")
+
+class MessageLog:
+    """
+    Journal des messages sur disque, en ajout seul, avec un index par numéro, date et contact.
+
+    Attributs :
+        path (str) : Le dossier de l'historique.
+        log (file) : Le journal des messages.
+        index (file) : L'index global des messages.
+        contact_indexes (dict) : Les index ouverts, par nom de contact.
+        count (int) : Le nombre de messages enregistrés.
+    """
+
+    def __init__(self, path="historique"):
+        """
+        Initialise la classe MessageLog et complète l'index si le journal a été interrompu.
+
+        Args:
+            path (str, optional): Le dossier de l'historique. Par défaut "historique".
+        """
+        self.path = path
+        os.makedirs(os.path.join(path, "contacts"), exist_ok=True)
+        self.log = open(os.path.join(path, "messages.log"), "a+b")
+        self.index = open(os.path.join(path, "messages.idx"), "a+b")
+        self.contact_indexes = {}
+        self.lock = threading.Lock()
+        self.count = 0
+        self._recover()
+
+    def __len__(self):
+        return self.count
+
+    def _recover(self):
+        # Retire un enregistrement incomplet, puis indexe les messages écrits après le dernier enregistrement
+        index_size = os.fstat(self.index.fileno()).st_size
+        self.count = index_size // INDEX_RECORD.size
+        if index_size % INDEX_RECORD.size:
+            self.index.truncate(self.count * INDEX_RECORD.size)
+
+        end = 0
+        if self.count:
+            _, offset, length = self._record(self.count - 1)
+            end = offset + length
+        self.log.seek(end)
+        for line in self.log.read().splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                # Dernière ligne coupée par un arrêt brutal
+                self.log.truncate(end)
+                break
+            entry = json.loads(line)
+            contact_index = self._contact_index(entry["contact"])
+            contact_size = os.fstat(contact_index.fileno()).st_size
+            last = self._contact_row(contact_index, contact_size // CONTACT_RECORD.size - 1) if contact_size else -1
+            if last < self.count:
+                contact_index.write(CONTACT_RECORD.pack(self.count))
+            self.index.write(INDEX_RECORD.pack(entry["t"], end, len(line)))
+            self.count += 1
+            end += len(line)
+        for index in [self.index] + list(self.contact_indexes.values()):
+            index.flush()
+
+    def _contact_index(self, contact):
+        index = self.contact_indexes.get(contact)
+        if index is None:
+            name = re.sub(r"[^\w-]", "_", contact) or "_"
+            index = open(os.path.join(self.path, "contacts", f"{name}.idx"), "a+b")
+            self.contact_indexes[contact] = index
+        return index
+
+    def _record(self, row):
+        self.index.seek(row * INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(self.index.read(INDEX_RECORD.size))
+
+    def _contact_row(self, index, position):
+        index.seek(position * CONTACT_RECORD.size)
+        return CONTACT_RECORD.unpack(index.read(CONTACT_RECORD.size))[0]
+
+    def append(self, contact, direction, text, timestamp=None):
+        """
+        Ajoute un message à la fin du journal.
+
+        Args:
+            contact (str): Le nom du contact ("" pour une note de l'application).
+            direction (str): "out" pour un message envoyé, "in" pour un message reçu, "info" pour une note.
+            text (str): Le texte du message.
+            timestamp (float, optional): L'instant du message selon time.time. Par défaut maintenant.
+
+        Returns:
+            int: Le numéro du message.
+        """
+        return self.extend([(contact, direction, text, timestamp)])[0]
+
+    def extend(self, entries):
+        """
+        Ajoute plusieurs messages en une seule écriture.
+
+        Args:
+            entries (list): Des tuples (contact, direction, texte, horodatage ou None).
+
+        Returns:
+            list: Les numéros des messages ajoutés.
+        """
+        with self.lock:
+            self.log.seek(0, os.SEEK_END)
+            offset = self.log.tell()
+            lines, records = [], []
+            rows = list(range(self.count, self.count + len(entries)))
+            for contact, direction, text, timestamp in entries:
+                timestamp = time.time() if timestamp is None else timestamp
+                line = (json.dumps({"t": timestamp, "contact": contact, "dir": direction, "text": text},
+                                   ensure_ascii=False) + "\n").encode()
+                lines.append(line)
+                records.append(INDEX_RECORD.pack(timestamp, offset, len(line)))
+                offset += len(line)
+
+            # Le journal est écrit avant les index : un arrêt brutal laisse au pire des messages à réindexer
+            self.log.write(b"".join(lines))
+            self.log.flush()
+            for (contact, *_), row in zip(entries, rows):
+                self._contact_index(contact).write(CONTACT_RECORD.pack(row))
+            for contact in {entry[0] for entry in entries}:
+                self.contact_indexes[contact].flush()
+            self.index.write(b"".join(records))
+            self.index.flush()
+            self.count += len(rows)
+            return rows
+
+    def get(self, row):
+        """
+        Lit un message par son numéro.
+
+        Args:
+            row (int): Le numéro du message, de 0 à len(self) - 1.
+
+        Returns:
+            Message: Le message.
+        """
+        with self.lock:
+            _, offset, length = self._record(row)
+            self.log.seek(offset)
+            entry = json.loads(self.log.read(length))
+        return Message(entry["t"], entry["contact"], entry["dir"], entry["text"])
+
+    def find_time(self, timestamp):
+        """
+        Cherche le premier message postérieur ou égal à un instant, par dichotomie sur l'index.
+
+        Args:
+            timestamp (float): L'instant recherché, selon time.time.
+
+        Returns:
+            int: Le numéro du premier message à partir de cet instant, ou len(self) s'il n'y en a pas.
+        """
+        with self.lock:
+            low, high = 0, self.count
+            while low < high:
+                middle = (low + high) // 2
+                if self._record(middle)[0] < timestamp:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+
+    def contact_rows(self, contact, start=0, stop=None):
+        """
+        Retourne les numéros des messages d'un contact.
+
+        Args:
+            contact (str): Le nom du contact.
+            start (int, optional): La position du premier message du contact. Par défaut 0.
+            stop (int, optional): La position de fin, exclue. Par défaut tous les messages.
+
+        Returns:
+            list: Les numéros de messages, dans l'ordre chronologique.
+        """
+        with self.lock:
+            index = self._contact_index(contact)
+            count = os.fstat(index.fileno()).st_size // CONTACT_RECORD.size
+            start, stop, _ = slice(start, stop).indices(count)
+            if start >= stop:
+                return []
+            index.seek(start * CONTACT_RECORD.size)
+            data = index.read((stop - start) * CONTACT_RECORD.size)
+            return [row for (row,) in CONTACT_RECORD.iter_unpack(data)]
+
+    def close(self):
+        """
+        Ferme le journal et les index.
+        """
+        with self.lock:
+            for f in [self.log, self.index] + list(self.contact_indexes.values()):
+                f.close()
+            self.contact_indexes = {}
+
+class ConversationModel(QtCore.QAbstractListModel):
+    """
+    Modèle Qt des dernières lignes de l'historique.
+
+    Le modèle ne garde en mémoire que les lignes récemment affichées : la vue ne demande
+    que les lignes visibles, lues à la demande dans le MessageLog. Les messages plus anciens
+    sont ajoutés par pages quand l'utilisateur remonte la conversation.
+
+    Attributs :
+        log (MessageLog) : L'historique des messages.
+        first (int) : Le numéro du message affiché sur la première ligne du modèle.
+        page_size (int) : Le nombre de messages chargés à chaque remontée.
+        max_rows (int) : Le nombre de lignes au-delà duquel les plus anciennes sont retirées par trim.
+        cache (OrderedDict) : Les derniers Message lus, par numéro, au plus cache_size.
+    """
+
+    def __init__(self, log, page_size=100, max_rows=500, cache_size=256, parent=None):
+        """
+        Initialise la classe ConversationModel sur les derniers messages de l'historique.
+
+        Args:
+            log (MessageLog): L'historique des messages.
+            page_size (int, optional): Messages chargés à chaque remontée. Par défaut 100.
+            max_rows (int, optional): Lignes conservées quand la vue est en bas. Par défaut 500.
+            cache_size (int, optional): Messages gardés en mémoire. Par défaut 256.
+            parent (QObject, optional): L'objet parent Qt.
+        """
+        super().__init__(parent)
+        self.log = log
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.first = max(len(log) - page_size, 0)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.log) - self.first
+
+    def message(self, row):
+        """
+        Retourne le Message d'une ligne du modèle, lu dans l'historique si besoin.
+
+        Args:
+            row (int): La ligne du modèle.
+
+        Returns:
+            Message: Le message affiché sur cette ligne.
+        """
+        number = self.first + row
+        message = self.cache.get(number)
+        if message is None:
+            message = self.log.get(number)
+            self.cache[number] = message
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(number)
+        return message
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return format_message(self.message(index.row()))
+        if role == QtCore.Qt.ToolTipRole:
+            message = self.message(index.row())
+            return f"{time.strftime('%d/%m/%Y %H:%M', time.localtime(message.timestamp))}\n{message.text}"
+        return None
+
+    def extend(self, entries):
+        """
+        Ajoute des messages à l'historique et à la fin du modèle, en une seule insertion.
+
+        Args:
+            entries (list): Des tuples (contact, direction, texte).
+        """
+        if not entries:
+            return
+        count = self.rowCount()
+        self.beginInsertRows(QtCore.QModelIndex(), count, count + len(entries) - 1)
+        self.log.extend([(contact, direction, text, None) for contact, direction, text in entries])
+        self.endInsertRows()
+
+    def can_load_older(self):
+        return self.first > 0
+
+    def load_older(self):
+        """
+        Ajoute en tête du modèle la page de messages précédente.
+
+        Returns:
+            int: Le nombre de lignes ajoutées.
+        """
+        count = min(self.page_size, self.first)
+        if count:
+            self.beginInsertRows(QtCore.QModelIndex(), 0, count - 1)
+            self.first -= count
+            self.endInsertRows()
+        return count
+
+    def trim(self):
+        """
+        Retire les lignes les plus anciennes au-delà de max_rows.
+        """
+        excess = self.rowCount() - self.max_rows
+        if excess > 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), 0, excess - 1)
+            self.first += excess
+            self.endRemoveRows()
+
+class ConversationView(QtWidgets.QListView):
+    """
+    Liste de la conversation : reste en bas quand un message arrive, et charge les messages
+    plus anciens quand l'utilisateur atteint le haut.
+
+    Toutes les lignes ont la même hauteur, ce qui évite à Qt de mesurer chaque message.
+    """
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setUniformItemSizes(True)
+        self.setWordWrap(False)
+        self.setTextElideMode(QtCore.Qt.ElideRight)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.follow = True
+        model.rowsInserted.connect(self.on_rows_inserted)
+        self.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        self.scrollToBottom()
+
+    def on_scroll(self, value):
+        bar = self.verticalScrollBar()
+        self.follow = value == bar.maximum()
+        if value == bar.minimum() and self.model().can_load_older():
+            # Garde à l'écran la même ligne après l'ajout des messages plus anciens
+            before = bar.maximum()
+            self.model().load_older()
+            self.doItemsLayout()
+            bar.setValue(bar.maximum() - before)
+
+    def on_rows_inserted(self, parent, first, last):
+        if self.follow and first > 0:
+            self.model().trim()
+            self.scrollToBottom()
+
+def format_message(message):
+    """
+    Met en forme un message pour une ligne de la conversation.
+
+    Args:
+        message (Message): Le message.
+
+    Returns:
+        str: Le texte affiché.
+    """
+    hour = time.strftime("%d/%m %H:%M", time.localtime(message.timestamp))
+    if message.direction == "out":
+        return f"{hour}  Moi → {message.contact}: {message.text}"
+    if message.direction == "in":
+        return f"{hour}  Reçu de {message.contact}: {message.text}"
+    return f"{hour}  {message.text}"
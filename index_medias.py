@@ -0,0 +1,230 @@
+"""
+Index des dossiers de médias (photos, musique), tenu à jour pendant l'exécution.
+
+Chaque dossier est lu une seule fois, puis suivi par les notifications du système
+(watchdog : inotify, FSEvents ou ReadDirectoryChangesW). Si watchdog n'est pas installé,
+un thread compare régulièrement le contenu des dossiers. Les widgets reçoivent des
+évènements d'ajout, de suppression et de modification, avec la position du fichier dans
+la liste triée : ils n'ont jamais à relire tout le dossier.
+"""
+
+import bisect
+import os
+import threading
+from PyQt5 import QtCore
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+MUSIC_EXTENSIONS = (".mp3",)
+
+class FolderIndex(QtCore.QObject):
+    """
+    Liste triée des fichiers d'un dossier ayant certaines extensions, mise à jour par évènements.
+
+    Les signaux sont toujours émis dans le thread Qt, après la mise à jour de files.
+
+    Attributs :
+        folder (str) : Le dossier suivi.
+        extensions (tuple) : Les extensions retenues, en minuscules.
+        files (list) : Les chemins des fichiers, triés ; la liste est modifiée sur place.
+        stats (dict) : La date de modification et la taille de chaque fichier, par chemin.
+    """
+
+    added = QtCore.pyqtSignal(str, int)
+    removed = QtCore.pyqtSignal(str, int)
+    modified = QtCore.pyqtSignal(str, int)
+    # Chemin à revérifier, émis depuis le thread de surveillance
+    changed = QtCore.pyqtSignal(str)
+
+    def __init__(self, folder, extensions):
+        """
+        Initialise la classe FolderIndex en lisant le dossier une fois.
+
+        Args:
+            folder (str): Le dossier à suivre.
+            extensions (tuple): Les extensions des fichiers retenus.
+        """
+        super().__init__()
+        self.folder = os.path.normpath(folder)
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.stats = {}
+        if os.path.isdir(self.folder):
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.is_file() and self.accepts(entry.path):
+                        stat = entry.stat()
+                        self.stats[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        self.files = sorted(self.stats)
+        self.changed.connect(self.apply, QtCore.Qt.QueuedConnection)
+
+    def accepts(self, path):
+        """
+        Indique si un chemin fait partie de l'index.
+
+        Args:
+            path (str): Le chemin du fichier.
+
+        Returns:
+            bool: True si le fichier est directement dans le dossier, visible, et a une extension retenue.
+        """
+        name = os.path.basename(path)
+        return (os.path.dirname(path) == self.folder and not name.startswith(".")
+                and name.lower().endswith(self.extensions))
+
+    def apply(self, path):
+        """
+        Met à jour l'index d'un fichier selon son état sur le disque, dans le thread Qt, puis
+        émet le signal correspondant.
+
+        L'état réel du fichier est relu plutôt que de se fier au type d'évènement : une suite
+        suppression-recréation ou des notifications en double donnent le bon résultat.
+
+        Args:
+            path (str): Le chemin du fichier concerné.
+        """
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+
+        position = bisect.bisect_left(self.files, path)
+        present = position < len(self.files) and self.files[position] == path
+        if signature is None:
+            if present:
+                del self.files[position]
+                del self.stats[path]
+                self.removed.emit(path, position)
+        elif not present:
+            self.files.insert(position, path)
+            self.stats[path] = signature
+            self.added.emit(path, position)
+        elif self.stats[path] != signature:
+            self.stats[path] = signature
+            self.modified.emit(path, position)
+
+class _WatchdogHandler(FileSystemEventHandler):
+    # Transmet les évènements watchdog d'un dossier à son FolderIndex
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    def dispatch(self, event):
+        if event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        for path in paths:
+            path = os.path.join(self.index.folder, os.path.basename(path)) if path else path
+            if path and self.index.accepts(path):
+                self.index.changed.emit(path)
+
+class MediaWatcher:
+    """
+    Service partagé de surveillance des dossiers de médias.
+
+    Attributs :
+        indexes (dict) : Les FolderIndex, par dossier et ensemble d'extensions.
+        observer (Observer or None) : L'observateur watchdog, None si watchdog est absent.
+        poll_interval (float) : La période de comparaison des dossiers sans watchdog, en secondes.
+    """
+
+    def __init__(self, poll_interval=5.0):
+        """
+        Initialise la classe MediaWatcher.
+
+        Args:
+            poll_interval (float, optional): Période de comparaison sans watchdog. Par défaut 5 s.
+        """
+        self.indexes = {}
+        self.poll_interval = poll_interval
+        self.observer = None
+        self.poll_thread = None
+        self.stop_event = threading.Event()
+
+    def index(self, folder, extensions):
+        """
+        Retourne l'index d'un dossier pour ces extensions, créé et suivi au premier appel.
+
+        Args:
+            folder (str): Le dossier.
+            extensions (tuple): Les extensions des fichiers retenus.
+
+        Returns:
+            FolderIndex: L'index partagé du dossier.
+        """
+        folder = os.path.normpath(folder)
+        key = (folder, frozenset(extension.lower() for extension in extensions))
+        index = self.indexes.get(key)
+        if index is not None:
+            return index
+        index = FolderIndex(folder, extensions)
+        self.indexes[key] = index
+        if not os.path.isdir(folder):
+            return index
+
+        if Observer is not None:
+            if self.observer is None:
+                self.observer = Observer()
+                self.observer.daemon = True
+                self.observer.start()
+            self.observer.schedule(_WatchdogHandler(index), folder, recursive=False)
+        elif self.poll_thread is None:
+            print("watchdog absent : les dossiers de médias sont relus toutes les "
+                  f"{self.poll_interval:.0f} s")
+            self.poll_thread = threading.Thread(target=self._poll, daemon=True)
+            self.poll_thread.start()
+        return index
+
+    def _poll(self):
+        # Compare le contenu de chaque dossier à l'index et signale les différences
+        while not self.stop_event.wait(self.poll_interval):
+            for index in list(self.indexes.values()):
+                try:
+                    with os.scandir(index.folder) as entries:
+                        current = {}
+                        for entry in entries:
+                            if entry.is_file() and index.accepts(entry.path):
+                                stat = entry.stat()
+                                current[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+                known = dict(index.stats)
+                for path in known.keys() - current.keys():
+                    index.changed.emit(path)
+                for path, signature in current.items():
+                    if known.get(path) != signature:
+                        index.changed.emit(path)
+
+    def stop(self):
+        """
+        Arrête la surveillance des dossiers.
+        """
+        self.stop_event.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer = None
+
+_watcher = None
+
+def media_index(folder, extensions):
+    """
+    Retourne l'index partagé d'un dossier de médias.
+
+    Args:
+        folder (str): Le dossier.
+        extensions (tuple): Les extensions des fichiers retenus.
+
+    Returns:
+        FolderIndex: L'index du dossier, commun à tous les widgets qui le demandent avec les mêmes extensions.
+    """
+    global _watcher
+    if _watcher is None:
+        _watcher = MediaWatcher()
+    return _watcher.index(folder, extensions)
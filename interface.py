@@ -1,12 +1,37 @@
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtCore import QTimer, QDateTime
-from api_domotique import ConnectedSocket
+from api_domotique import ConnectedSocket, AsyncSocketClient
 from api_discord import DiscordBot
 from carres import CornerSquares
+from calibration import ScreenCalibration
+from processus_vision import VisionProcess
+from lissage import MarkerSmoother
+from historique import MessageLog, ConversationModel, ConversationView
 from photos import PhotoSlideshow
 from lecteur_musique import MusicWindow
 import config
 
+class SocketResultBridge(QtCore.QObject):
+    """
+    Relaie vers le thread Qt les résultats des requêtes domotiques terminées dans le pool de threads.
+
+    Le signal finished transporte (action, résultat, exception) ; émis depuis un autre thread,
+    il est mis en file et traité par la boucle d'événements de l'interface.
+    """
+    finished = QtCore.pyqtSignal(str, object, object)
+
+class DiscordBridge(QtCore.QObject):
+    """
+    Relaie vers le thread Qt les évènements du bot Discord, émis depuis sa boucle asyncio.
+
+    Le signal received transporte (contact, texte) d'un message reçu, delivered le
+    DeliveryResult d'un message envoyé, et emergency_reported l'EmergencyReport d'une
+    alerte d'urgence.
+    """
+    received = QtCore.pyqtSignal(str, str)
+    delivered = QtCore.pyqtSignal(object)
+    emergency_reported = QtCore.pyqtSignal(object)
+
 class MainWindow(QtWidgets.QMainWindow): 
     """
     Classe principale pour la fenêtre de l'application "Med Board".
@@ -17,26 +42,50 @@ class MainWindow(QtWidgets.QMainWindow):
 
     Attributes:
         discord_bot (DiscordBot): Instance du bot Discord pour gérer les messages.
+        discord_bridge (DiscordBridge): Ramène les évènements du bot Discord dans le thread Qt.
         light_on (bool): État de la lumière (allumée ou éteinte).
         button_on (bool): État du bouton (activé ou désactivé).
         music_on (bool): Indique si la musique est en cours de lecture.
+        music_window (MusicWindow or None): Le lecteur de musique, None tant qu'il n'a pas été ouvert.
         emergency_active (bool): Indique si le mode d'urgence est activé.
         connected_socket (ConnectedSocket): Instance pour gérer les prises connectées.
+        socket_client (AsyncSocketClient): Exécute les requêtes domotiques hors du thread de l'interface.
+        socket_bridge (SocketResultBridge): Ramène les résultats des requêtes domotiques dans le thread Qt.
         calendar (QtWidgets.QCalendarWidget): Widget calendrier dans la barre latérale gauche.
         time_label (QtWidgets.QLabel): Label pour afficher l'heure actuelle.
         date_label (QtWidgets.QLabel): Label pour afficher la date actuelle.
         timer (QTimer): Timer pour mettre à jour l'heure affichée toutes les secondes.
         photo_slideshow (PhotoSlideshow): Diaporama de photos.
-        conversation_text (QtWidgets.QTextEdit): Zone de texte pour afficher les conversations Discord.
+        message_log (MessageLog): Historique des conversations Discord, conservé sur disque.
+        conversation_model (ConversationModel): Modèle des derniers messages de l'historique.
+        conversation_view (ConversationView): Liste virtualisée affichant les conversations Discord.
+        pending_received (list): Messages reçus pas encore affichés, regroupés jusqu'à la prochaine image.
+        received_timer (QTimer): Timer d'une image qui affiche d'un coup les messages reçus en attente.
         title_label (QtWidgets.QLabel): Label pour le titre de la section de conversation.
+        corner_squares (CornerSquares): Carrés de calibration affichés dans les coins.
+        calibration (ScreenCalibration): Correspondance entre la caméra et la fenêtre.
+        vision (VisionProcess): Processus de détection des carrés, None tant qu'il n'est pas démarré.
+        vision_timer (QTimer): Timer qui relève les détections du processus de vision.
+        last_detections (list): Dernières détections reçues du processus de vision.
+        marker_smoother (MarkerSmoother): Lissage et prédiction des centres des carrés détectés.
     """
 
     def __init__(self, discord_bot):
         super().__init__()
 
         # Initialise le bot Discord et définit un callback pour les messages reçus
+        # Le callback est appelé depuis le thread du bot : le signal ramène les messages dans le thread Qt
         self.discord_bot = discord_bot
-        self.discord_bot.set_message_received_callback(self.add_received_message)
+        self.discord_bridge = DiscordBridge()
+        self.discord_bridge.received.connect(self.queue_received_message, QtCore.Qt.QueuedConnection)
+        self.discord_bot.set_message_received_callback(self.discord_bridge.received.emit)
+        self.pending_received = []
+        self.received_timer = QTimer(self)
+        self.received_timer.setSingleShot(True)
+        self.received_timer.setInterval(16)
+        self.received_timer.timeout.connect(self.flush_received_messages)
+        self.discord_bridge.delivered.connect(self.on_message_delivered)
+        self.discord_bridge.emergency_reported.connect(self.on_emergency_report)
 
         # Définition des propriétés de la fenêtre principale
         self.setWindowTitle("Med Board")
@@ -48,11 +97,27 @@ class MainWindow(QtWidgets.QMainWindow):
         self.light_on = False
         self.button_on = False
         self.music_on = False
+        self.music_window = None
         self.emergency_active = False
 
+        self.vision = None
+        self.vision_timer = None
+        self.last_detections = []
+        self.marker_smoother = MarkerSmoother()
+
         # Initialisation de la prise connectée et authentification
-        self.connected_socket = ConnectedSocket()
-        self.connected_socket.authenticate()
+        # L'authentification se fait en arrière-plan : la fenêtre s'affiche sans attendre la prise
+        # Les prises de l'interface (lumière 6, alarme 5) sont celles du contrôleur de la chambre
+        self.connected_socket = ConnectedSocket(**config.controllers["chambre"])
+        self.socket_client = AsyncSocketClient(self.connected_socket)
+        self.socket_bridge = SocketResultBridge()
+        self.socket_bridge.finished.connect(self.on_socket_result)
+        self.socket_client.authenticate(callback=self.socket_callback("login"))
+        self.connected_socket.start_polling()
+
+        # Détection des carrés de calibration, si une caméra ou une vidéo est configurée
+        if config.vision_source is not None:
+            self.start_vision(config.vision_source)
 
     def initUI(self):
         """
@@ -170,12 +235,12 @@ class MainWindow(QtWidgets.QMainWindow):
         button_layout.addWidget(music_btn)
 
         # Bouton Lumière
-        light_btn = QtWidgets.QPushButton("Lumière")
-        light_btn.setFont(QtGui.QFont('Helvetica', 18))
-        light_btn.setStyleSheet("background-color: #B0E0E6; border-radius: 15px; color: white;")
-        light_btn.setFixedSize(200, 60)
-        light_btn.clicked.connect(self.toggle_light)
-        button_layout.addWidget(light_btn)
+        self.light_btn = QtWidgets.QPushButton("Lumière")
+        self.light_btn.setFont(QtGui.QFont('Helvetica', 18))
+        self.light_btn.setStyleSheet("background-color: #B0E0E6; border-radius: 15px; color: white;")
+        self.light_btn.setFixedSize(200, 60)
+        self.light_btn.clicked.connect(self.toggle_light)
+        button_layout.addWidget(self.light_btn)
 
         # Bouton Message
         message_btn = QtWidgets.QPushButton("Message")
@@ -194,10 +259,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.title_label = QtWidgets.QLabel("Conversation")
         self.title_label.setStyleSheet("font-weight: bold; font-size: 16px; margin-bottom: 10px;")
         main_section_layout.addWidget(self.title_label)
-        self.conversation_text = QtWidgets.QTextEdit()
-        self.conversation_text.setReadOnly(True)
-        self.conversation_text.setStyleSheet("background-color: #FFFFFF; border-radius: 15px;")
-        main_section_layout.addWidget(self.conversation_text)
+        # Seules les lignes visibles sont lues dans l'historique et affichées
+        self.message_log = MessageLog(config.history_path)
+        self.conversation_model = ConversationModel(self.message_log)
+        self.conversation_view = ConversationView(self.conversation_model)
+        self.conversation_view.setStyleSheet("background-color: #FFFFFF; border-radius: 15px;")
+        main_section_layout.addWidget(self.conversation_view)
 
         # Barre latérale droite -----------------------------------------------------------------------------------------------------
         sidebar_right = QtWidgets.QFrame()
@@ -282,6 +349,68 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Ajout des carrés de calibration -----------------------------------------------------------------------------------------------------
         self.corner_squares = CornerSquares(main_widget)
+        self.calibration = ScreenCalibration()
+        self.corner_squares.add_position_listener(self.calibration.set_screen_points)
+
+    def start_vision(self, source=0):
+        """
+        Démarre la détection des carrés dans un processus séparé.
+
+        Args:
+            source (str or int, optional): Le chemin de la vidéo ou l'index de la caméra. Par défaut 0.
+        """
+        if self.vision is not None:
+            return
+        self.vision = VisionProcess(source)
+        self.vision.start()
+        self.vision_timer = QTimer(self)
+        self.vision_timer.timeout.connect(self.poll_vision)
+        self.vision_timer.start(15)
+
+    def stop_vision(self):
+        """
+        Arrête le processus de détection des carrés.
+        """
+        if self.vision is None:
+            return
+        self.vision_timer.stop()
+        self.vision.stop()
+        self.vision = None
+
+    def poll_vision(self):
+        # Relève les dernières détections, sans recevoir d'image
+        result = self.vision.latest_detections()
+        if result is None:
+            return
+        _, timestamp, self.last_detections = result
+        self.marker_smoother.update([detection.centroid for detection in self.last_detections], timestamp)
+
+        # Les positions lissées survivent aux occultations d'une ou deux images
+        positions = self.marker_smoother.positions()
+        if len(positions) == 4:
+            self.calibration.update(positions)
+
+    def closeEvent(self, event):
+        self.stop_vision()
+        self.photo_slideshow.shutdown()
+        self.socket_client.shutdown()
+        if self.music_window is not None:
+            self.music_window.library.shutdown()
+        self.message_log.close()
+        super().closeEvent(event)
+
+    def map_camera_point(self, x, y):
+        """
+        Convertit un point de l'image caméra en coordonnées de la fenêtre principale.
+
+        Args:
+            x (float): L'abscisse dans l'image caméra.
+            y (float): L'ordonnée dans l'image caméra.
+
+        Returns:
+            tuple or None: Le point (x, y) dans la fenêtre, ou None si non calibré.
+        """
+        return self.calibration.map_point(x, y)
 
     # Fonction qui sera appelée lors du clic sur appel d'urgence
     def on_emergency_button_clicked(self):
@@ -296,15 +425,41 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def start_emergency(self):
         print("Bouton d'appel d'urgence cliqué !")
-        self.discord_bot.send_emergency_message()
+        self.discord_bot.send_emergency_message(callback=self.discord_bridge.emergency_reported.emit)
         self.connected_socket.blink_socket(5)
         self.emergency_active = True
 
+    def on_emergency_report(self, report):
+        # Affiche dans la conversation quels contacts ont reçu l'alerte
+        sent = sum(result.sent for result in report.results)
+        self.add_conversation_message(f"Urgence : {sent}/{len(report.results)} contact(s) prévenu(s) en {report.elapsed:.1f} s")
+        for result in report.results:
+            if result.sent:
+                self.add_conversation_message(f"    ✓ {result.contact} ({result.latency:.1f} s)")
+            else:
+                self.add_conversation_message(f"    ⚠️ {result.contact} non prévenu ({result.error})")
+
     def stop_emergency(self):
         print("Arrêt de l'urgence")
-        self.connected_socket.stop_blinking()
         self.emergency_active = False
-        self.connected_socket.toggle_socket_state(5, state =0)
+        # L'arrêt ne bloque pas l'interface : la prise est éteinte en arrière-plan
+        future = self.connected_socket.stop_blinking(5, final_state=0)
+        if future is not None:
+            callback = self.socket_callback("alarm")
+            future.add_done_callback(lambda f: callback(None if f.exception() else f.result(), f.exception()))
+
+    def socket_callback(self, action):
+        # Callback du pool de threads qui renvoie le résultat vers le thread Qt
+        return lambda result, error: self.socket_bridge.finished.emit(action, result, error)
+
+    def on_socket_result(self, action, result, error):
+        # Met à jour l'interface quand une requête domotique se termine
+        if error is not None or result is None:
+            print(f"Échec de la commande domotique '{action}' : {error}")
+        if action == "light":
+            # En cas d'échec, le bouton revient à son état précédent
+            self.light_on = (result == 1) if result is not None else not self.light_on
+            self.update_light_button()
 
     def update_time(self):
         # Mise à jour de l'heure et de la date actuelles
@@ -319,12 +474,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.music_window.show()
 
     def toggle_light(self):
-        # Allume ou éteint la lumière
+        # Allume ou éteint la lumière, le bouton change tout de suite et la requête part en arrière-plan
         self.light_on = not self.light_on
-        light_color = "#50b3c2" if self.light_on else "#B0E0E6"
         print(f"Lumière {'allumée' if self.light_on else 'éteinte'}")
-        self.sender().setStyleSheet(f"background-color: {light_color}; border-radius: 15px; color: white;")
-        self.connected_socket.toggle_socket_state(6)
+        self.update_light_button()
+        self.socket_client.toggle_socket_state(6, callback=self.socket_callback("light"))
+
+    def update_light_button(self):
+        light_color = "#50b3c2" if self.light_on else "#B0E0E6"
+        self.light_btn.setStyleSheet(f"background-color: {light_color}; border-radius: 15px; color: white;")
 
     def show_contact_selection(self):
         # Affiche la fenêtre de sélection de contact
@@ -376,19 +534,31 @@ class MainWindow(QtWidgets.QMainWindow):
 
         print(f"Message envoyé à {self.selected_contact}: {selected_message}")
 
-        self.discord_bot.send_message(self.selected_contact, selected_message)
+        self.discord_bot.send_message(self.selected_contact, selected_message, callback=self.discord_bridge.delivered.emit)
         self.message_window.accept()
 
-        self.add_conversation_message(f"Moi → {self.selected_contact}: {selected_message}")
+        self.add_conversation_message(selected_message, self.selected_contact, "out")
+
+    def on_message_delivered(self, result):
+        # Signale dans la conversation les messages que le bot n'a pas pu envoyer
+        if not result.sent:
+            self.add_conversation_message(f"⚠️ Non envoyé à {result.contact} ({result.error}) : {result.message}")
+
+    def add_conversation_message(self, message, contact="", direction="info"):
+        # Ajoute un message à l'historique et à la section de conversation
+        self.conversation_model.extend([(contact, direction, message)])
+
+    def queue_received_message(self, contact, message):
+        # Les messages arrivés pendant la même image sont affichés en un seul ajout
+        self.pending_received.append((contact, message))
+        if not self.received_timer.isActive():
+            self.received_timer.start()
 
-    def add_conversation_message(self, message):
-        # Ajoute un message à la section de conversation
-        self.conversation_text.append(message)
-        self.conversation_text.moveCursor(QtGui.QTextCursor.End)
-        self.conversation_text.ensureCursorVisible()
+    def flush_received_messages(self):
+        messages, self.pending_received = self.pending_received, []
+        if messages:
+            self.add_received_messages(messages)
 
-    def add_received_message(self, message):
-        # Ajoute un message reçu à la section de conversation
-        self.conversation_text.append(f"Reçu: {message}")
-        self.conversation_text.moveCursor(QtGui.QTextCursor.End)
-        self.conversation_text.ensureCursorVisible()
+    def add_received_messages(self, messages):
+        # Ajoute des messages reçus à l'historique et à la conversation, en une seule insertion
+        self.conversation_model.extend([(contact, "in", message) for contact, message in messages])
@@ -1,7 +1,10 @@
 import sys
 import os
+import bisect
 from PyQt5 import QtWidgets, QtCore, QtGui
 import pygame
+from index_medias import MUSIC_EXTENSIONS, media_index
+from bibliotheque_musique import format_track, music_library
 
 class MusicWindow(QtWidgets.QDialog):
     """
@@ -12,7 +15,9 @@ class MusicWindow(QtWidgets.QDialog):
 
     Attributs :
         music_list (QListWidget) : Liste des fichiers musicaux.
-        music_files (list) : Liste des chemins des fichiers musicaux.
+        music_index (FolderIndex) : L'index partagé du dossier de musique, qui signale les fichiers ajoutés ou retirés.
+        music_files (list) : Liste triée des chemins des fichiers musicaux, tenue à jour par music_index.
+        library (MusicLibrary) : Titres, artistes, durées et pochettes des morceaux, indexés en arrière-plan.
         cover_label (QLabel) : Label pour afficher la couverture de l'album.
         song_label (QLabel) : Label pour afficher le nom de la musique en cours de lecture.
         prev_btn (QPushButton) : Bouton pour passer à la musique précédente.
@@ -23,6 +28,8 @@ class MusicWindow(QtWidgets.QDialog):
         is_paused (bool) : Indique si la musique est en pause.
         current_music (str) : Chemin du fichier musical en cours de lecture.
         current_item (QListWidgetItem) : Élément de la liste correspondant à la musique en cours de lecture.
+        current_index (int or None) : Position de la musique en cours dans music_files.
+        highlighted_item (QListWidgetItem) : Élément actuellement mis en surbrillance.
     """
 
     def __init__(self):
@@ -37,7 +44,11 @@ class MusicWindow(QtWidgets.QDialog):
         layout = QtWidgets.QVBoxLayout()
 
         self.music_list = QtWidgets.QListWidget()
+        self.music_list.setUniformItemSizes(True)
         self.music_files = []
+        self.library = None
+        self.current_index = None
+        self.highlighted_item = None
         self.load_music_files()
         self.music_list.itemClicked.connect(self.select_music)
         layout.addWidget(self.music_list)
@@ -94,12 +105,60 @@ class MusicWindow(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Erreur", "Le dossier de musique spécifié n'existe pas.")
             return
 
-        for file in os.listdir(music_folder):
-            if file.endswith(".mp3"):
-                item = QtWidgets.QListWidgetItem(file)
-                item.setData(QtCore.Qt.UserRole, os.path.join(music_folder, file))
-                self.music_list.addItem(item)
-                self.music_files.append(os.path.join(music_folder, file))
+        # Le dossier n'est lu qu'une fois pour toute l'application ; les changements arrivent par évènements
+        self.music_index = media_index(music_folder, MUSIC_EXTENSIONS)
+        self.music_files = self.music_index.files
+
+        # Les étiquettes déjà indexées s'affichent tout de suite, les autres arrivent en arrière-plan
+        self.library = music_library(music_folder)
+        tracks = self.library.tracks()
+        self.music_list.setUpdatesEnabled(False)
+        for path in self.music_files:
+            self.music_list.addItem(self.create_item(path, tracks.get(path)))
+        self.music_list.setUpdatesEnabled(True)
+        self.library.track_updated.connect(self.on_track_updated)
+        self.library.refresh(self.music_files, complete=True)
+
+        self.music_index.added.connect(self.on_music_added)
+        self.music_index.removed.connect(self.on_music_removed)
+        self.music_index.modified.connect(self.on_music_modified)
+
+    def create_item(self, path, track=None):
+        item = QtWidgets.QListWidgetItem(format_track(track) if track else os.path.basename(path))
+        item.setData(QtCore.Qt.UserRole, path)
+        return item
+
+    def on_music_added(self, path, position):
+        self.music_list.insertItem(position, self.create_item(path, self.library.track(path)))
+        if self.current_index is not None and position <= self.current_index:
+            self.current_index += 1
+        self.library.refresh([path])
+
+    def on_music_removed(self, path, position):
+        item = self.music_list.takeItem(position)
+        if item is self.highlighted_item:
+            self.highlighted_item = None
+        if self.current_index is not None:
+            if position < self.current_index:
+                self.current_index -= 1
+            elif position == self.current_index:
+                self.current_index, self.current_item = None, None
+        self.library.forget(path)
+
+    def on_music_modified(self, path, position):
+        self.library.refresh([path])
+
+    def on_track_updated(self, path):
+        # Met à jour la seule ligne du morceau relu
+        position = bisect.bisect_left(self.music_files, path)
+        if position == len(self.music_files) or self.music_files[position] != path:
+            return
+        track = self.library.track(path)
+        if track is None:
+            return
+        self.music_list.item(position).setText(format_track(track))
+        if position == self.current_index:
+            self.song_label.setText(f"Now Playing: {format_track(track)}")
 
     def select_music(self, item):
         """
@@ -110,8 +169,23 @@ class MusicWindow(QtWidgets.QDialog):
         """
         self.current_music = item.data(QtCore.Qt.UserRole)
         self.current_item = item
+        self.current_index = self.music_list.row(item)
 
         self.song_label.setText(f"Now Playing: {item.text()}")
+        self.show_cover()
+        self.highlight_current_item()
+
+    def show_cover(self):
+        """
+        Affiche la pochette intégrée au morceau en cours, ou l'image de la playlist à défaut.
+        """
+        cover = self.library.cover(self.current_music) if self.library else None
+        if cover is not None:
+            image = QtGui.QImage.fromData(cover)
+            if not image.isNull():
+                image = image.scaled(200, 200, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+                self.cover_label.setPixmap(QtGui.QPixmap.fromImage(image))
+                return
 
         image_path = "/Users/clementine/Desktop/proj/V7/musique/image_playlist.png"
         if os.path.exists(image_path):
@@ -120,8 +194,6 @@ class MusicWindow(QtWidgets.QDialog):
         else:
             self.cover_label.setPixmap(QtGui.QPixmap(100, 100).fill(QtGui.QColor('gray')))
 
-        self.highlight_current_item()
-
     def play_pause(self):
         """
         Lit ou met en pause la musique sélectionnée.
@@ -151,42 +223,48 @@ class MusicWindow(QtWidgets.QDialog):
         """
         Passe à la musique suivante dans la liste de lecture.
         """
-        if self.current_music:
-            current_index = self.music_files.index(self.current_music)
-            next_index = (current_index + 1) % len(self.music_files)
-            self.current_music = self.music_files[next_index]
-            pygame.mixer.music.load(self.current_music)
-            pygame.mixer.music.play()
-
-            # Mettre à jour le texte de la musique et l'élément de la liste
-            self.song_label.setText(f"Now Playing: {os.path.basename(self.current_music)}")
-            self.update_current_item(next_index)
+        if self.current_index is not None and self.music_files:
+            self.play_index((self.current_index + 1) % len(self.music_files))
 
     def prev_track(self):
         """
         Passe à la musique précédente dans la liste de lecture.
         """
-        if self.current_music:
-            current_index = self.music_files.index(self.current_music)
-            prev_index = (current_index - 1) % len(self.music_files)
-            self.current_music = self.music_files[prev_index]
-            pygame.mixer.music.load(self.current_music)
-            pygame.mixer.music.play()
+        if self.current_index is not None and self.music_files:
+            self.play_index((self.current_index - 1) % len(self.music_files))
+
+    def play_index(self, index):
+        """
+        Lit la musique à une position de la liste de lecture.
+
+        Args:
+            index (int): La position dans music_files.
+        """
+        self.current_index = index
+        self.current_music = self.music_files[index]
+        pygame.mixer.music.load(self.current_music)
+        pygame.mixer.music.play()
+        self.is_paused = False
 
-            self.song_label.setText(f"Now Playing: {os.path.basename(self.current_music)}")
-            self.update_current_item(prev_index)
-    
+        # Mettre à jour le texte de la musique et l'élément de la liste
+        self.update_current_item(index)
+        self.song_label.setText(f"Now Playing: {self.current_item.text()}")
+        self.show_cover()
 
     def highlight_current_item(self):
         """
         Met en surbrillance l'élément de la liste correspondant à la musique en cours de lecture.
+
+        Seuls l'ancien et le nouvel élément sont modifiés.
         """
-        for i in range(self.music_list.count()):
-            item = self.music_list.item(i)
-            if item == self.current_item:
-                item.setBackground(QtGui.QColor(200, 200, 255))
-            else:
-                item.setBackground(QtGui.QColor(255, 255, 255))
+        if self.highlighted_item is self.current_item:
+            return
+        if self.highlighted_item is not None:
+            self.highlighted_item.setBackground(QtGui.QColor(255, 255, 255))
+        if self.current_item is not None:
+            self.current_item.setBackground(QtGui.QColor(200, 200, 255))
+            self.music_list.scrollToItem(self.current_item)
+        self.highlighted_item = self.current_item
 
     def update_current_item(self, index):
         """
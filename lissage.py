@@ -0,0 +1,159 @@
+import time
+import numpy as np
+
+class MarkerFilter:
+    """
+    Filtre de Kalman à vitesse constante pour la position d'un marqueur.
+
+    Attributs :
+        state (numpy.ndarray) : L'état [x, y, vx, vy] à l'instant timestamp.
+        covariance (numpy.ndarray) : La covariance 4x4 de l'état.
+        timestamp (float) : L'instant de la dernière mesure, selon time.monotonic.
+        process_noise (float) : La variance de l'accélération, en pixels²/s⁴.
+        measurement_noise (float) : La variance d'une mesure, en pixels².
+    """
+
+    H = np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]])
+
+    def __init__(self, x, y, timestamp, process_noise=5000.0, measurement_noise=4.0):
+        """
+        Initialise la classe MarkerFilter sur une première mesure.
+
+        Args:
+            x (float): L'abscisse mesurée.
+            y (float): L'ordonnée mesurée.
+            timestamp (float): L'instant de la mesure.
+            process_noise (float, optional): Variance de l'accélération. Par défaut 5000.
+            measurement_noise (float, optional): Variance d'une mesure. Par défaut 4.
+        """
+        self.state = np.array([x, y, 0.0, 0.0])
+        self.covariance = np.diag([measurement_noise, measurement_noise, 1e4, 1e4])
+        self.timestamp = timestamp
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+    def _transition(self, dt):
+        f = np.eye(4)
+        f[0, 2] = f[1, 3] = dt
+        # Bruit d'accélération blanc, identique sur les deux axes
+        q = self.process_noise * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        noise = np.zeros((4, 4))
+        noise[np.ix_([0, 2], [0, 2])] = q
+        noise[np.ix_([1, 3], [1, 3])] = q
+        return f, noise
+
+    def predict(self, timestamp):
+        """
+        Extrapole la position à un instant donné, sans modifier le filtre.
+
+        Args:
+            timestamp (float): L'instant visé, selon time.monotonic.
+
+        Returns:
+            tuple: La position (x, y) prédite.
+        """
+        dt = max(timestamp - self.timestamp, 0.0)
+        x, y, vx, vy = self.state
+        return (float(x + vx * dt), float(y + vy * dt))
+
+    def update(self, x, y, timestamp):
+        """
+        Intègre une nouvelle mesure.
+
+        Args:
+            x (float): L'abscisse mesurée.
+            y (float): L'ordonnée mesurée.
+            timestamp (float): L'instant de la mesure.
+        """
+        dt = max(timestamp - self.timestamp, 0.0)
+        f, noise = self._transition(dt)
+        state = f @ self.state
+        covariance = f @ self.covariance @ f.T + noise
+
+        innovation = np.array([x, y]) - self.H @ state
+        s = self.H @ covariance @ self.H.T + self.measurement_noise * np.eye(2)
+        gain = covariance @ self.H.T @ np.linalg.inv(s)
+        self.state = state + gain @ innovation
+        self.covariance = (np.eye(4) - gain @ self.H) @ covariance
+        self.timestamp = timestamp
+
+class MarkerSmoother:
+    """
+    Suivi temporel des centres des marqueurs : lissage, prédiction et maintien
+    pendant les courtes occultations.
+
+    Chaque centre mesuré est associé à la piste la plus proche. Une piste sans mesure
+    reste prédite pendant max_missing secondes avant d'être abandonnée. Les positions
+    renvoyées sont extrapolées jusqu'à l'instant présent, ce qui compense la latence
+    entre la capture et l'affichage.
+
+    Attributs :
+        max_distance (float) : La distance maximale en pixels entre une mesure et sa piste.
+        max_missing (float) : La durée maximale sans mesure avant d'abandonner une piste, en secondes.
+        lead (float) : Une avance supplémentaire de prédiction, en secondes (latence d'affichage).
+        tracks (list) : Les MarkerFilter actifs.
+    """
+
+    def __init__(self, max_distance=40.0, max_missing=0.3, lead=0.0, process_noise=5000.0, measurement_noise=4.0):
+        """
+        Initialise la classe MarkerSmoother.
+
+        Args:
+            max_distance (float, optional): Distance maximale d'association. Par défaut 40.
+            max_missing (float, optional): Durée de maintien sans mesure. Par défaut 0.3 s.
+            lead (float, optional): Avance de prédiction supplémentaire. Par défaut 0.
+            process_noise (float, optional): Variance de l'accélération des filtres. Par défaut 5000.
+            measurement_noise (float, optional): Variance des mesures. Par défaut 4.
+        """
+        self.max_distance = max_distance
+        self.max_missing = max_missing
+        self.lead = lead
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.tracks = []
+
+    def update(self, centroids, timestamp=None):
+        """
+        Intègre les centres mesurés sur une image.
+
+        Args:
+            centroids (list): Les centres (x, y) mesurés.
+            timestamp (float, optional): L'instant de capture selon time.monotonic. Par défaut maintenant.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        free = list(self.tracks)
+        for x, y in centroids:
+            best, best_distance = None, self.max_distance
+            for track in free:
+                px, py = track.predict(timestamp)
+                distance = np.hypot(px - x, py - y)
+                if distance <= best_distance:
+                    best, best_distance = track, distance
+            if best is None:
+                self.tracks.append(MarkerFilter(x, y, timestamp, self.process_noise, self.measurement_noise))
+            else:
+                best.update(x, y, timestamp)
+                free.remove(best)
+
+        self.tracks = [track for track in self.tracks if timestamp - track.timestamp <= self.max_missing]
+
+    def positions(self, now=None):
+        """
+        Retourne la position prédite de chaque marqueur suivi.
+
+        Args:
+            now (float, optional): L'instant visé selon time.monotonic. Par défaut maintenant.
+
+        Returns:
+            list: Les positions (x, y), une par piste active.
+        """
+        target = (time.monotonic() if now is None else now) + self.lead
+        return [track.predict(target) for track in self.tracks if target - track.timestamp <= self.max_missing + self.lead]
+
+    def reset(self):
+        """
+        Oublie toutes les pistes.
+        """
+        self.tracks = []
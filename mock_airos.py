@@ -0,0 +1,297 @@
+"""
+Serveur local imitant un contrôleur de prises AirOS (mPower), pour tester et mesurer
+ConnectedSocket sans l'appareil réel.
+
+Points d'accès imités :
+    POST /login.cgi                 authentification, pose le cookie AIROS_SESSIONID
+    GET  /sensors                   état de toutes les prises
+    GET  /sensors/<id>/<clé>        une information d'une prise
+    PUT  /sensors/<id>              changement de l'état de sortie (output=0 ou 1)
+
+Une session inconnue ou expirée reçoit une redirection vers /login.cgi, comme l'appareil.
+
+Exemple :
+    python mock_airos.py --port 8080 --latency 0.05 --error-rate 0.02 --session-lifetime 30
+"""
+
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class MockAirOSServer:
+    """
+    Classe pour exécuter un faux contrôleur de prises dans un thread.
+
+    Les réglages peuvent être modifiés pendant l'exécution.
+
+    Attributs :
+        host (str) : L'adresse d'écoute.
+        port (int) : Le port d'écoute (0 pour un port libre choisi par le système).
+        latency (float) : Le délai moyen ajouté à chaque réponse, en secondes.
+        jitter (float) : La variation aléatoire maximale du délai, en secondes.
+        error_rate (float) : La proportion de requêtes qui reçoivent une erreur 500.
+        session_lifetime (float or None) : La durée de vie d'une session, en secondes (None : illimitée).
+        sockets (dict) : L'état de chaque prise, par ID.
+        sessions (dict) : L'instant de création de chaque session, par ID de session.
+        stats (Counter) : Le nombre de requêtes par type (login, get, snapshot, put, expired, error).
+        put_times (defaultdict) : Les instants (time.monotonic) et états de chaque PUT, par ID de prise.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, sockets=8, latency=0.0, jitter=0.0, error_rate=0.0,
+                 session_lifetime=None, username="ubnt", password="ubnt"):
+        """
+        Initialise la classe MockAirOSServer.
+
+        Args:
+            host (str, optional): L'adresse d'écoute. Par défaut 127.0.0.1.
+            port (int, optional): Le port d'écoute. Par défaut 0 (port libre).
+            sockets (int, optional): Le nombre de prises du contrôleur. Par défaut 8.
+            latency (float, optional): Délai moyen de réponse, en secondes. Par défaut 0.
+            jitter (float, optional): Variation maximale du délai, en secondes. Par défaut 0.
+            error_rate (float, optional): Proportion de réponses en erreur. Par défaut 0.
+            session_lifetime (float, optional): Durée de vie d'une session, en secondes. Par défaut illimitée.
+            username (str, optional): Le nom d'utilisateur accepté. Par défaut "ubnt".
+            password (str, optional): Le mot de passe accepté. Par défaut "ubnt".
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.session_lifetime = session_lifetime
+        self.username = username
+        self.password = password
+        self.sockets = {port: {"port": port, "output": 0, "power": 0.0, "current": 0.0, "voltage": 230.0}
+                        for port in range(1, sockets + 1)}
+        self.sessions = {}
+        self.stats = Counter()
+        self.put_times = defaultdict(list)
+        self.lock = threading.Lock()
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """
+        Démarre le serveur dans un thread.
+
+        Returns:
+            str: L'adresse du serveur, à passer comme base_url à ConnectedSocket.
+        """
+        server = self
+
+        class Handler(MockAirOSHandler):
+            mock = server
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        """
+        Arrête le serveur.
+        """
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def reset_stats(self):
+        """
+        Remet à zéro les compteurs de requêtes et les instants des PUT.
+        """
+        with self.lock:
+            self.stats.clear()
+            self.put_times.clear()
+
+    def expire_sessions(self):
+        """
+        Fait expirer immédiatement toutes les sessions.
+        """
+        with self.lock:
+            self.sessions.clear()
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def session_valid(self, session_id):
+        with self.lock:
+            created = self.sessions.get(session_id)
+            if created is None:
+                return False
+            if self.session_lifetime is not None and time.monotonic() - created > self.session_lifetime:
+                del self.sessions[session_id]
+                return False
+            return True
+
+    def new_session(self):
+        session_id = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[session_id] = time.monotonic()
+        return session_id
+
+class MockAirOSHandler(BaseHTTPRequestHandler):
+    """
+    Gestionnaire des requêtes HTTP du faux contrôleur ; mock est le MockAirOSServer associé.
+    """
+
+    mock = None
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, l'ACK retardé du client
+    # ajouterait environ 40 ms à chaque réponse
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _delay(self):
+        mock = self.mock
+        delay = mock.latency + random.uniform(-mock.jitter, mock.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _read_form(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode() if length else ""
+        return {key: values[0] for key, values in parse_qs(body).items()}
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data):
+        self._send(200, json.dumps(data).encode())
+
+    def _session_id(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "AIROS_SESSIONID":
+                return value
+        return None
+
+    def _check(self):
+        """
+        Applique la latence, les erreurs simulées et la vérification de session.
+
+        Returns:
+            bool: True si la requête peut être traitée.
+        """
+        self._delay()
+        if random.random() < self.mock.error_rate:
+            self.mock.count("error")
+            self._send(500, b"Erreur simulee", "text/plain")
+            return False
+        if not self.mock.session_valid(self._session_id()):
+            self.mock.count("expired")
+            self._send(302, headers={"Location": f"/login.cgi?uri={self.path}"}, content_type="text/html")
+            return False
+        return True
+
+    def _socket_path(self):
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if not parts or parts[0] != "sensors":
+            return None
+        try:
+            return [int(parts[1])] + parts[2:] if len(parts) > 1 else []
+        except ValueError:
+            return None
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/login.cgi":
+            self._send(404, content_type="text/plain")
+            return
+        self._delay()
+        self.mock.count("login")
+        form = self._read_form()
+        if form.get("username") != self.mock.username or form.get("password") != self.mock.password:
+            self._send(200, b"<html>Login</html>", "text/html")
+            return
+        session_id = self.mock.new_session()
+        self._send(200, b"<html>OK</html>", "text/html", {"Set-Cookie": f"AIROS_SESSIONID={session_id}; Path=/"})
+
+    def do_GET(self):
+        path = self._socket_path()
+        if path is None:
+            self._send(404, content_type="text/plain")
+            return
+        if not self._check():
+            return
+        with self.mock.lock:
+            if not path:
+                self.mock.stats["snapshot"] += 1
+                sensors = [dict(socket) for socket in self.mock.sockets.values()]
+            else:
+                self.mock.stats["get"] += 1
+                entry = self.mock.sockets.get(path[0])
+                socket = dict(entry) if entry is not None else None
+        if not path:
+            self._send_json({"sensors": sensors, "status": "success"})
+            return
+        if socket is None:
+            self._send(404, content_type="text/plain")
+            return
+        sensor = {"port": socket["port"]}
+        if len(path) > 1:
+            sensor[path[1]] = socket.get(path[1])
+        else:
+            sensor.update(socket)
+        self._send_json({"sensors": [sensor], "status": "success"})
+
+    def do_PUT(self):
+        path = self._socket_path()
+        form = self._read_form()
+        if not path:
+            self._send(404, content_type="text/plain")
+            return
+        if not self._check():
+            return
+        with self.mock.lock:
+            socket = self.mock.sockets.get(path[0])
+            if socket is not None and "output" in form:
+                socket["output"] = int(form["output"])
+                self.mock.put_times[path[0]].append((time.monotonic(), socket["output"]))
+            self.mock.stats["put"] += 1
+        if socket is None:
+            self._send(404, content_type="text/plain")
+            return
+        self._send_json({"status": "success"})
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux contrôleur de prises AirOS.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sockets", type=int, default=8, help="Nombre de prises.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai moyen de réponse, en secondes.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variation maximale du délai, en secondes.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses en erreur 500.")
+    parser.add_argument("--session-lifetime", type=float, default=None, help="Durée de vie d'une session, en secondes.")
+    args = parser.parse_args()
+
+    server = MockAirOSServer(args.host, args.port, args.sockets, args.latency, args.jitter,
+                             args.error_rate, args.session_lifetime)
+    print(f"Faux contrôleur AirOS sur {server.start()}")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,207 @@
 from PyQt5 import QtWidgets, QtGui, QtCore
 import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from index_medias import IMAGE_EXTENSIONS, media_index
+
+def render_image(path, width, height, radius=20):
+    """
+    Décode une image à la taille d'affichage et arrondit ses bords.
+
+    Peut être appelée hors du thread de l'interface : elle ne travaille que sur des QImage.
+    Les JPEG sont décodés directement à une taille réduite, sans passer par la pleine résolution.
+
+    Args:
+        path (str): Le chemin de l'image.
+        width (int): La largeur maximale affichée.
+        height (int): La hauteur maximale affichée.
+        radius (int, optional): Le rayon des bords arrondis. Par défaut 20.
+
+    Returns:
+        QImage or None: L'image prête à afficher, ou None si le fichier n'est pas lisible.
+    """
+    reader = QtGui.QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > 2 * width or original.height() > 2 * height):
+        # Deux fois la taille visée : le lissage final garde la qualité d'une réduction complète
+        reader.setScaledSize(original.scaled(2 * width, 2 * height, QtCore.Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        print(f"Erreur lors du chargement de l'image {path} : {reader.errorString()}")
+        return None
+    image = image.scaled(width, height, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+
+    rounded = QtGui.QImage(image.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+    rounded.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(rounded)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    clip = QtGui.QPainterPath()
+    clip.addRoundedRect(0, 0, image.width(), image.height(), radius, radius)
+    painter.setClipPath(clip)
+    painter.drawImage(0, 0, image)
+    painter.end()
+    return rounded
+
+class ThumbnailStore:
+    """
+    Cache sur disque des images à la taille d'affichage, pour ne pas redécoder les originaux.
+
+    Chaque image dérivée est repérée par le chemin, la date de modification et la taille de
+    l'original ainsi que par la taille d'affichage : un original modifié ou remplacé produit
+    une nouvelle clé, et l'ancienne entrée est supprimée au prochain nettoyage.
+
+    Attributs :
+        folder (str) : Le dossier des images dérivées.
+        radius (int) : Le rayon des bords arrondis des images dérivées.
+    """
+
+    def __init__(self, folder, radius=20):
+        """
+        Initialise la classe ThumbnailStore.
+
+        Args:
+            folder (str): Le dossier des images dérivées, créé si besoin.
+            radius (int, optional): Le rayon des bords arrondis. Par défaut 20.
+        """
+        self.folder = folder
+        self.radius = radius
+        os.makedirs(folder, exist_ok=True)
+
+    def key(self, path, width, height):
+        """
+        Calcule le nom de l'image dérivée d'un original.
+
+        Args:
+            path (str): Le chemin de l'original.
+            width (int): La largeur d'affichage.
+            height (int): La hauteur d'affichage.
+
+        Returns:
+            str or None: Le nom du fichier dérivé, ou None si l'original est introuvable.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{width}x{height}|{self.radius}"
+        return hashlib.sha1(signature.encode()).hexdigest() + ".png"
+
+    def load(self, path, width, height):
+        """
+        Retourne l'image dérivée d'un original, en la créant si elle n'existe pas encore.
+
+        Args:
+            path (str): Le chemin de l'original.
+            width (int): La largeur d'affichage.
+            height (int): La hauteur d'affichage.
+
+        Returns:
+            QImage or None: L'image prête à afficher, ou None si l'original n'est pas lisible.
+        """
+        key = self.key(path, width, height)
+        if key is None:
+            return None
+        cached = os.path.join(self.folder, key)
+        if os.path.exists(cached):
+            image = QtGui.QImage(cached)
+            if not image.isNull():
+                return image
+
+        image = render_image(path, width, height, self.radius)
+        if image is not None:
+            # Écriture dans un fichier temporaire puis renommage : jamais de fichier dérivé à moitié écrit
+            temporary = f"{cached}.{os.getpid()}.{id(image)}.tmp"
+            if image.save(temporary, "PNG"):
+                os.replace(temporary, cached)
+        return image
+
+    def build(self, paths, width, height, stop=None):
+        """
+        Crée les images dérivées manquantes, puis supprime celles qui ne correspondent plus à aucun original.
+
+        Args:
+            paths (list): Les chemins des originaux.
+            width (int): La largeur d'affichage.
+            height (int): La hauteur d'affichage.
+            stop (threading.Event, optional): Interrompt la création entre deux fichiers, sans nettoyage.
+        """
+        keep = set()
+        for path in paths:
+            if stop is not None and stop.is_set():
+                return
+            key = self.key(path, width, height)
+            if key is None:
+                continue
+            keep.add(key)
+            if not os.path.exists(os.path.join(self.folder, key)):
+                self.load(path, width, height)
+        self.cleanup(keep)
+
+    def cleanup(self, keep):
+        """
+        Supprime les images dérivées obsolètes.
+
+        Args:
+            keep (set): Les noms des fichiers dérivés à conserver.
+        """
+        for name in os.listdir(self.folder):
+            # Les fichiers temporaires appartiennent à une écriture en cours
+            if name not in keep and not name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+class ImageCache:
+    """
+    Cache LRU des images prêtes à afficher, limité par la mémoire occupée.
+
+    Attributs :
+        max_bytes (int) : La taille maximale du cache, en octets.
+        images (OrderedDict) : Les QImage par chemin, de la moins à la plus récemment utilisée.
+        size (int) : La mémoire occupée par les images, en octets.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """
+        Initialise la classe ImageCache.
+
+        Args:
+            max_bytes (int, optional): La taille maximale du cache, en octets. Par défaut 32 Mo.
+        """
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.size = 0
+
+    def get(self, path):
+        image = self.images.get(path)
+        if image is not None:
+            self.images.move_to_end(path)
+        return image
+
+    def put(self, path, image):
+        self.discard(path)
+        self.images[path] = image
+        self.size += image.sizeInBytes()
+        while self.size > self.max_bytes and len(self.images) > 1:
+            _, oldest = self.images.popitem(last=False)
+            self.size -= oldest.sizeInBytes()
+
+    def discard(self, path):
+        image = self.images.pop(path, None)
+        if image is not None:
+            self.size -= image.sizeInBytes()
+
+class ImageBridge(QtCore.QObject):
+    """
+    Relaie vers le thread Qt les images décodées par le pool de threads.
+
+    Le signal decoded transporte (chemin, QImage ou None).
+    """
+    decoded = QtCore.pyqtSignal(str, object)
 
 class PhotoSlideshow(QtWidgets.QWidget):
     """
@@ -10,27 +212,49 @@ class PhotoSlideshow(QtWidgets.QWidget):
 
     Attributs :
         image_folder (str) : Chemin du dossier contenant les images.
-        image_files (list) : Liste des chemins des fichiers image.
+        image_index (FolderIndex) : L'index partagé du dossier, qui signale les images ajoutées ou retirées.
+        image_files (list) : Liste triée des chemins des fichiers image, tenue à jour par image_index.
         current_index (int) : Index de l'image actuellement affichée.
         main_layout (QHBoxLayout) : Layout principal pour organiser les widgets.
         prev_button (QPushButton) : Bouton pour afficher l'image précédente.
         image_label (QLabel) : Label pour afficher l'image avec des bords arrondis.
         next_button (QPushButton) : Bouton pour afficher l'image suivante.
         timer (QTimer) : Timer pour changer d'image automatiquement toutes les 3 minutes.
+        cache (ImageCache) : Les images déjà décodées, réduites et arrondies.
+        store (ThumbnailStore) : Les mêmes images conservées sur disque entre deux démarrages.
+        executor (ThreadPoolExecutor) : Le pool de threads qui décode les images.
+        pending (set) : Les chemins en cours de décodage.
+        stop_event (threading.Event) : Levé à la fermeture pour interrompre la création des images dérivées.
+        bridge (ImageBridge) : Ramène les images décodées dans le thread Qt.
     """
 
-    def __init__(self, image_folder, parent=None):
+    def __init__(self, image_folder, parent=None, cache_bytes=32 * 1024 * 1024, workers=2):
         """
         Initialise la classe PhotoSlideshow.
 
         Args:
             image_folder (str): Chemin du dossier contenant les images.
             parent (QWidget, optional): Widget parent. Par défaut None.
+            cache_bytes (int, optional): Mémoire maximale des images en cache. Par défaut 32 Mo.
+            workers (int, optional): Nombre de threads de décodage. Par défaut 2.
         """
         super().__init__(parent)
 
+        # Les images sont décodées hors du thread de l'interface, puis gardées en cache
+        self.cache = ImageCache(cache_bytes)
+        self.store = ThumbnailStore(os.path.join(image_folder, ".miniatures"))
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = set()
+        self.stop_event = threading.Event()
+        self.bridge = ImageBridge()
+        self.bridge.decoded.connect(self.on_image_decoded)
+
         self.image_folder = image_folder
-        self.image_files = [os.path.join(image_folder, f) for f in os.listdir(image_folder) if f.endswith((".png", ".jpg", ".jpeg", ".JPG"))]
+        self.image_index = media_index(image_folder, IMAGE_EXTENSIONS)
+        self.image_files = self.image_index.files
+        self.image_index.added.connect(self.on_image_added)
+        self.image_index.removed.connect(self.on_image_removed)
+        self.image_index.modified.connect(self.on_image_modified)
         self.current_index = 0
 
         self.setFixedSize(600, 350)
@@ -61,6 +285,10 @@ class PhotoSlideshow(QtWidgets.QWidget):
 
         self.show_image()
 
+        # Les images dérivées manquantes sont créées en arrière-plan, après les premières images affichées
+        size = self.image_label.size()
+        self.executor.submit(self.store.build, list(self.image_files), size.width(), size.height(), self.stop_event)
+
     def button_style(self):
         """
         Retourne le style des boutons de navigation.
@@ -82,24 +310,82 @@ class PhotoSlideshow(QtWidgets.QWidget):
 
     def show_image(self):
         """
-        Affiche l'image actuelle avec des bords arrondis.
+        Affiche l'image actuelle avec des bords arrondis, puis prépare ses voisines.
+
+        Si l'image n'est pas encore en cache, elle est décodée en arrière-plan et affichée
+        dès qu'elle est prête ; l'image précédente reste affichée en attendant.
         """
         if self.image_files:
-            pixmap = QtGui.QPixmap(self.image_files[self.current_index])
-            pixmap = pixmap.scaled(self.image_label.size(), QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+            path = self.image_files[self.current_index]
+            image = self.cache.get(path)
+            if image is not None:
+                self.image_label.setPixmap(QtGui.QPixmap.fromImage(image))
+            else:
+                self.request_image(path)
 
-            rounded_pixmap = QtGui.QPixmap(pixmap.size())
-            rounded_pixmap.fill(QtCore.Qt.transparent)
+            # Les images suivante et précédente sont prêtes avant que l'utilisateur ne les demande
+            for step in (1, -1):
+                self.request_image(self.image_files[(self.current_index + step) % len(self.image_files)])
 
-            painter = QtGui.QPainter(rounded_pixmap)
-            painter.setRenderHint(QtGui.QPainter.Antialiasing)
-            path = QtGui.QPainterPath()
-            path.addRoundedRect(0, 0, pixmap.width(), pixmap.height(), 20, 20)
-            painter.setClipPath(path)
-            painter.drawPixmap(0, 0, pixmap)
-            painter.end()
+    def request_image(self, path):
+        """
+        Demande le décodage d'une image si elle n'est ni en cache ni déjà en cours.
 
-            self.image_label.setPixmap(rounded_pixmap)
+        Args:
+            path (str): Le chemin de l'image.
+        """
+        if self.stop_event.is_set() or path in self.pending or self.cache.get(path) is not None:
+            return
+        self.pending.add(path)
+        size = self.image_label.size()
+        future = self.executor.submit(self.store.load, path, size.width(), size.height())
+        future.add_done_callback(lambda f: self.bridge.decoded.emit(
+            path, None if f.cancelled() or f.exception() else f.result()))
+
+    def shutdown(self):
+        """
+        Arrête le décodage en arrière-plan sans attendre la fin du dossier.
+
+        Les décodages en attente sont annulés et la création des images dérivées s'arrête
+        après le fichier en cours : la fermeture de l'application n'attend pas tout le dossier.
+        """
+        self.stop_event.set()
+        self.timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def on_image_decoded(self, path, image):
+        # Appelée dans le thread Qt quand une image est prête
+        self.pending.discard(path)
+        if image is None:
+            return
+        self.cache.put(path, image)
+        if self.image_files and self.image_files[self.current_index] == path:
+            self.image_label.setPixmap(QtGui.QPixmap.fromImage(image))
+
+    def on_image_added(self, path, position):
+        # La liste est déjà à jour : l'image affichée garde sa place
+        if len(self.image_files) == 1:
+            self.current_index = 0
+            self.show_image()
+        elif position <= self.current_index:
+            self.current_index += 1
+
+    def on_image_removed(self, path, position):
+        self.cache.discard(path)
+        if not self.image_files:
+            self.current_index = 0
+            self.image_label.clear()
+        elif position < self.current_index:
+            self.current_index -= 1
+        elif position == self.current_index:
+            self.current_index %= len(self.image_files)
+            self.show_image()
+
+    def on_image_modified(self, path, position):
+        # La clé du cache sur disque change avec la date de modification : l'image est redécodée
+        self.cache.discard(path)
+        if position == self.current_index:
+            self.show_image()
 
     def show_next_image(self):
         """
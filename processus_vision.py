@@ -0,0 +1,316 @@
+import multiprocessing as mp
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+
+# OpenCV et detection_carres ne sont importés que dans le processus de vision : l'interface
+# PyQt5 n'a pas à charger OpenCV ni ses propres modules Qt
+
+# Mêmes champs que detection_carres.Detection, redéfinis ici pour que le décodage dans
+# l'interface n'importe pas detection_carres (et donc cv2)
+Detection = namedtuple("Detection", ["centroid", "corners", "area", "confidence"])
+
+# Nombre maximal de carrés transmis par image, et taille d'un enregistrement :
+# cX, cY, aire, confiance, puis les quatre sommets (x, y)
+MAX_DETECTIONS = 16
+RECORD_SIZE = 12
+
+class SharedRing:
+    """
+    Tampon circulaire en mémoire partagée, écrit par un seul processus et lu par un autre
+    sans copie ni sérialisation.
+
+    Chaque emplacement porte un numéro de séquence. L'écrivain le passe à -1 pendant
+    l'écriture puis y inscrit le nouveau numéro ; le lecteur vérifie que le numéro n'a pas
+    changé pendant sa lecture, sinon il recommence (verrou de séquence).
+
+    Attributs :
+        shape (tuple) : La forme du tableau stocké dans chaque emplacement.
+        dtype (numpy.dtype) : Le type des éléments stockés.
+        slots (int) : Le nombre d'emplacements du tampon.
+        shm (SharedMemory) : Le bloc de mémoire partagée.
+        header (numpy.ndarray) : Les (séquence, nombre d'éléments, horodatage en ns) de chaque
+            emplacement, la dernière ligne contenant la séquence la plus récente.
+        data (numpy.ndarray) : Les emplacements, de forme (slots,) + shape.
+    """
+
+    def __init__(self, shape, dtype, slots=3, name=None):
+        """
+        Crée un tampon, ou s'attache à un tampon existant si name est donné.
+
+        Args:
+            shape (tuple): La forme du tableau stocké dans chaque emplacement.
+            dtype (numpy.dtype): Le type des éléments stockés.
+            slots (int, optional): Le nombre d'emplacements. Par défaut 3.
+            name (str, optional): Le nom d'un bloc existant auquel s'attacher.
+        """
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        header_size = (slots + 1) * 3 * 8
+        data_size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_size + data_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.header = np.ndarray((slots + 1, 3), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=header_size)
+        if self.owner:
+            self.header[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def latest_seq(self):
+        """
+        Retourne le numéro de la dernière écriture terminée, ou -1 si aucune.
+        """
+        return int(self.header[-1, 0])
+
+    def write(self, seq, array, count=None, timestamp=0.0):
+        """
+        Écrit un tableau dans l'emplacement correspondant à seq.
+
+        Args:
+            seq (int): Le numéro de séquence, croissant.
+            array (numpy.ndarray): Le tableau à écrire ; sa première dimension peut être plus
+                petite que celle de shape.
+            count (int, optional): Le nombre de lignes utiles. Par défaut len(array).
+            timestamp (float, optional): L'instant de capture selon time.monotonic. Par défaut 0.
+        """
+        slot = seq % self.slots
+        self.header[slot, 0] = -1
+        self.data[slot][:len(array)] = array
+        self.header[slot, 1] = len(array) if count is None else count
+        self.header[slot, 2] = int(timestamp * 1e9)
+        self.header[slot, 0] = seq
+        self.header[-1, 0] = seq
+
+    def read(self, copy=True, retries=3):
+        """
+        Lit le dernier emplacement écrit.
+
+        Args:
+            copy (bool, optional): Si False, renvoie une vue sur la mémoire partagée, valable
+                jusqu'à ce que l'écrivain fasse le tour du tampon. Par défaut True.
+            retries (int, optional): Nombre de tentatives si l'écrivain modifie l'emplacement. Par défaut 3.
+
+        Returns:
+            tuple or None: (seq, timestamp, tableau) limité aux éléments utiles, ou None si rien n'est lisible.
+        """
+        for _ in range(retries):
+            seq = self.latest_seq
+            if seq < 0:
+                return None
+            slot = seq % self.slots
+            if self.header[slot, 0] != seq:
+                continue
+            count = int(self.header[slot, 1])
+            timestamp = self.header[slot, 2] / 1e9
+            array = self.data[slot][:count]
+            if copy:
+                array = array.copy()
+            if self.header[slot, 0] == seq:
+                return seq, timestamp, array
+        return None
+
+    def close(self):
+        """
+        Détache le tampon, et le supprime si ce processus l'a créé.
+        """
+        # Les vues NumPy doivent disparaître avant de fermer le bloc
+        del self.header, self.data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def encode_detections(detections):
+    """
+    Convertit une liste de Detection en tableau d'enregistrements de taille fixe.
+
+    Args:
+        detections (list): Les Detection à encoder.
+
+    Returns:
+        numpy.ndarray: Tableau (n, RECORD_SIZE) de float32, n <= MAX_DETECTIONS.
+    """
+    records = np.zeros((min(len(detections), MAX_DETECTIONS), RECORD_SIZE), dtype=np.float32)
+    for record, detection in zip(records, detections):
+        record[0:2] = detection.centroid
+        record[2] = detection.area
+        record[3] = detection.confidence
+        record[4:12] = np.ravel(detection.corners)
+    return records
+
+def decode_detections(records):
+    """
+    Reconstruit les Detection à partir des enregistrements de la mémoire partagée.
+
+    Args:
+        records (numpy.ndarray): Tableau (n, RECORD_SIZE) de float32.
+
+    Returns:
+        list: Les Detection correspondantes.
+    """
+    detections = []
+    for record in records:
+        corners = tuple((int(x), int(y)) for x, y in record[4:12].reshape(4, 2))
+        detections.append(Detection((float(record[0]), float(record[1])), corners, float(record[2]), float(record[3])))
+    return detections
+
+def run_vision_worker(source, frame_shape, frame_ring_name, detection_ring_name, preview, stop, tracking):
+    """
+    Boucle du processus de vision : capture, détection, puis écriture dans les tampons partagés.
+
+    Args:
+        source (str or int): Le chemin de la vidéo ou l'index de la caméra.
+        frame_shape (tuple): La forme (hauteur, largeur, 3) des images partagées.
+        frame_ring_name (str): Le nom du tampon des images.
+        detection_ring_name (str): Le nom du tampon des détections.
+        preview (Event): Levé quand l'interface demande les images en plus des détections.
+        stop (Event): Levé pour arrêter le processus.
+        tracking (bool): Utilise le suivi par régions d'intérêt.
+    """
+    import cv2
+    from detection_carres import FramePipeline, SquareDetector, SquareTracker
+
+    frames = SharedRing(frame_shape, np.uint8, name=frame_ring_name)
+    detections = SharedRing((MAX_DETECTIONS, RECORD_SIZE), np.float32, name=detection_ring_name)
+    detector = SquareTracker() if tracking else SquareDetector()
+    pipeline = FramePipeline(source, detect=detector.detect)
+    height, width = frame_shape[:2]
+
+    if not pipeline.start():
+        frames.close()
+        detections.close()
+        return
+    try:
+        for seq, timestamp, frame, result in pipeline.results():
+            if stop.is_set():
+                break
+            detections.write(seq, encode_detections(result), timestamp=timestamp)
+            if preview.is_set():
+                if frame.shape[:2] != (height, width):
+                    frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                frames.write(seq, frame, timestamp=timestamp)
+    finally:
+        pipeline.stop()
+        frames.close()
+        detections.close()
+
+class VisionProcess:
+    """
+    Classe pour exécuter la détection dans un processus séparé de l'interface PyQt5.
+
+    Les détections et, sur demande, les images transitent par des tampons en mémoire
+    partagée : l'interface ne reçoit que quelques octets par image et aucune image n'est
+    sérialisée.
+
+    Attributs :
+        source (str or int) : Le chemin de la vidéo ou l'index de la caméra.
+        frame_shape (tuple) : La forme (hauteur, largeur, 3) des images d'aperçu.
+        tracking (bool) : Utilise le suivi par régions d'intérêt dans le processus de vision.
+        context (multiprocessing.context.SpawnContext) : Le contexte de lancement du processus (spawn).
+        process (Process or None) : Le processus de vision.
+        last_seq (int) : Le numéro des dernières détections renvoyées.
+    """
+
+    def __init__(self, source=0, frame_size=(640, 480), tracking=True):
+        """
+        Initialise la classe VisionProcess.
+
+        Args:
+            source (str or int, optional): Le chemin de la vidéo ou l'index de la caméra. Par défaut 0.
+            frame_size (tuple, optional): La taille (largeur, hauteur) des images d'aperçu. Par défaut (640, 480).
+            tracking (bool, optional): Utilise le suivi par régions d'intérêt. Par défaut True.
+        """
+        self.source = source
+        self.frame_shape = (frame_size[1], frame_size[0], 3)
+        self.tracking = tracking
+        self.process = None
+        self.frames = None
+        self.detections = None
+        self.last_seq = -1
+        # Le processus est lancé par spawn : un fork de l'interface, qui a déjà des threads
+        # (Discord, prises, exécuteurs), pourrait bloquer l'enfant sur un verrou hérité
+        self.context = mp.get_context("spawn")
+        self.preview = self.context.Event()
+        self.stop_event = self.context.Event()
+
+    def start(self):
+        """
+        Crée les tampons partagés et démarre le processus de vision.
+        """
+        self.frames = SharedRing(self.frame_shape, np.uint8)
+        self.detections = SharedRing((MAX_DETECTIONS, RECORD_SIZE), np.float32)
+        self.stop_event.clear()
+        self.process = self.context.Process(
+            target=run_vision_worker,
+            args=(self.source, self.frame_shape, self.frames.name, self.detections.name,
+                  self.preview, self.stop_event, self.tracking),
+            daemon=True,
+        )
+        self.process.start()
+
+    def stop(self):
+        """
+        Arrête le processus de vision et libère les tampons partagés.
+        """
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+        self.frames.close()
+        self.detections.close()
+        self.frames = self.detections = None
+
+    def set_preview(self, enabled):
+        """
+        Active ou désactive l'envoi des images en plus des détections.
+
+        Args:
+            enabled (bool): True pour recevoir les images.
+        """
+        if enabled:
+            self.preview.set()
+        else:
+            self.preview.clear()
+
+    def latest_detections(self):
+        """
+        Retourne les détections les plus récentes si elles n'ont pas encore été lues.
+
+        Returns:
+            tuple or None: (seq, timestamp, liste de Detection), ou None si rien de nouveau.
+                timestamp est l'instant de capture selon time.monotonic, commun aux deux processus.
+        """
+        if self.detections is None or self.detections.latest_seq == self.last_seq:
+            return None
+        result = self.detections.read()
+        if result is None:
+            return None
+        seq, timestamp, records = result
+        self.last_seq = seq
+        return seq, timestamp, decode_detections(records)
+
+    def latest_frame(self):
+        """
+        Retourne la dernière image d'aperçu, si l'aperçu est activé.
+
+        Returns:
+            tuple or None: (seq, timestamp, image BGR), ou None si aucune image n'est disponible.
+        """
+        if self.frames is None or not self.preview.is_set():
+            return None
+        result = self.frames.read()
+        if result is None:
+            return None
+        return result